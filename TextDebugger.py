@@ -1,25 +1,142 @@
 import pygame
+import time
+from collections import deque
+from fonts import Fonts, text_cache
 
 
 class Renderer():
+    TEXT_COLOR = (255, 255, 255)
+    GRAPH_HEIGHT = 40
+    GRAPH_COLOR = (0, 255, 0)
+
     def __init__(self, font_size=26):
-        self.font = pygame.font.Font(None, font_size)
+        # Created on the first render
+        self.font = None
+        self.font_size = font_size
         self._padding = font_size
         self.lines = []
+        self.graph = None
 
     def clear(self):
         self.lines.clear()
+        self.graph = None
 
     def add(self, text):
         self.lines.append(text)
 
+    def set_graph(self, values, max_value):
+        '''Sparkline drawn under the text, values are scaled to max_value'''
+        self.graph = (values, max_value)
+
     def render(self, surface):
+        '''Returns the list of rects drawn'''
+        if self.font is None:
+            self.font = Fonts.get(self.font_size)
+
         y = 0
         screen_x = surface.get_rect().width
+        rects = []
         for text in self.lines:
-            textsurf = self.font.render(
-                    text, False, pygame.color.Color('white'))
+            textsurf = text_cache.render(self.font, text, self.TEXT_COLOR)
 
             x = screen_x - textsurf.get_rect().width
-            surface.blit(textsurf, (x, y))
+            rects.append(surface.blit(textsurf, (x, y)))
             y += self._padding
+
+        if self.graph is not None:
+            rects.append(self._render_graph(surface, y))
+        return rects
+
+    def _render_graph(self, surface, top):
+        values, max_value = self.graph
+        if len(values) < 2:
+            return pygame.rect.Rect(0, top, 0, 0)
+
+        left = surface.get_rect().width - len(values)
+        bottom = top + self.GRAPH_HEIGHT
+        points = [(left + i,
+                   bottom - min(v / max_value, 1) * self.GRAPH_HEIGHT)
+                  for i, v in enumerate(values)]
+        return pygame.draw.lines(surface, self.GRAPH_COLOR, False, points)
+
+
+class FrameTimer():
+    '''
+    Rolling per phase timings of the last WINDOW frames.
+    While disabled, start and stop return right away.
+
+        t = timer.start()
+        ...
+        timer.stop('phase', t)
+        ...
+        timer.end_frame()
+    '''
+    WINDOW = 120
+
+    def __init__(self):
+        self.enabled = False
+        self.phases = []  # In order of first appearance
+        self._current = {}
+        self._history = {}
+        self._frames = deque(maxlen=self.WINDOW)
+        self._frame_start = None
+        # Key: phase
+        # Value: seconds of every frame since the last clear
+        self.totals = {}
+
+    def set_enabled(self, enabled):
+        self.enabled = enabled
+        self.clear()
+
+    def start(self):
+        if not self.enabled:
+            return 0
+        return time.perf_counter()
+
+    def stop(self, name, start):
+        if not self.enabled:
+            return
+        elapsed = time.perf_counter() - start
+        if name in self._current:
+            self._current[name] += elapsed
+        else:
+            self._current[name] = elapsed
+
+    def end_frame(self):
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        if self._frame_start is not None:
+            self._frames.append(now - self._frame_start)
+        self._frame_start = now
+
+        for name, elapsed in self._current.items():
+            if name not in self._history:
+                self.phases.append(name)
+                self._history[name] = deque(maxlen=self.WINDOW)
+            self._history[name].append(elapsed)
+            self.totals[name] = self.totals.get(name, 0) + elapsed
+        self._current.clear()
+
+    def stats(self, name=None):
+        '''
+        Returns (min, avg, p99) in seconds of a phase,
+        or of whole frames when name is None
+        '''
+        samples = self._frames if name is None else self._history[name]
+        if len(samples) == 0:
+            return (0, 0, 0)
+        ordered = sorted(samples)
+        p99 = ordered[int(0.99 * (len(ordered) - 1))]
+        return (ordered[0], sum(ordered) / len(ordered), p99)
+
+    def frame_times(self):
+        return list(self._frames)
+
+    def clear(self):
+        self.phases.clear()
+        self._current.clear()
+        self._history.clear()
+        self._frames.clear()
+        self._frame_start = None
+        self.totals.clear()
@@ -0,0 +1,192 @@
+#!/usr/bin/python3
+'''
+Allocation benchmark, memory allocated by every tick of each scenario
+of benchmarks/scenarios.py, traced with tracemalloc.
+
+Short lived objects (vectors, rects, tuples) are freed right away and
+never show up in a snapshot, so the object updates are also traced one
+by one: an update allocates when the traced peak went up during it.
+Reported per tick:
+
+    allocating  object updates that allocated
+    update KiB  traced peak of those updates, added up
+    peak KiB    highest traced memory above the start of the tick
+    net blocks  blocks still allocated at the end of the tick
+
+Runs are seeded, so the numbers only change when the code does.
+
+    python3 benchmarks/allocations.py
+    python3 benchmarks/allocations.py --scenario wave_2 --top 10
+    python3 benchmarks/allocations.py --update-baseline
+
+Exits with 1 when a scenario allocates more than its baseline
+(plus --threshold) in any column.
+'''
+import os
+import sys
+import argparse
+import json
+import random
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import headless  # noqa: E402
+import scenarios  # noqa: E402
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BASELINE = os.path.join(BENCH_DIR, 'allocations_baseline.json')
+COLUMNS = ('allocating', 'update KiB', 'peak KiB', 'net blocks')
+DT = scenarios.DT
+TICKS = 120
+
+
+class NoUpdate:
+    def update(self, delta_time):
+        pass
+
+
+def probe(gobj):
+    '''Bytes of traced peak during gobj.update, probe included'''
+    tracemalloc.reset_peak()
+    before = tracemalloc.get_traced_memory()[0]
+    gobj.update(DT)
+    return tracemalloc.get_traced_memory()[1] - before
+
+
+def probe_updates(sim, counts, overhead):
+    '''
+    Replaces Updater.update_objects of sim, counts[type name] is
+    [updates that allocated, bytes]
+    '''
+    def update_objects(delta_time):
+        for gobj in sim.game.world.get_all_objects():
+            allocated = probe(gobj) - overhead
+            if allocated > 0:
+                count = counts.setdefault(type(gobj).__name__, [0, 0])
+                count[0] += 1
+                count[1] += allocated
+    sim.updater.update_objects = update_objects
+
+
+def tick(sim):
+    '''One Simulation.tick, returns the peak in bytes'''
+    tracemalloc.reset_peak()
+    start = tracemalloc.get_traced_memory()[0]
+    sim.tick(DT)
+    # The per object probes reset the peak, only the rest is measured
+    return tracemalloc.get_traced_memory()[1] - start
+
+
+def run_scenario(display, name, ticks=TICKS, seed=0, top=0):
+    setup, warmup, measured = scenarios.SCENARIOS[name]
+    ticks = min(ticks, measured)
+    random.seed(seed)
+    sim = setup(display)
+
+    counts = {}
+    for i in range(warmup):
+        sim.tick(DT)
+
+    tracemalloc.start()
+    # What the probe itself allocates
+    overhead = max(probe(NoUpdate()) for i in range(10))
+    probe_updates(sim, counts, overhead)
+    before = tracemalloc.take_snapshot()
+    peak = 0
+    for i in range(ticks):
+        peak = max(peak, tick(sim))
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    ignored = [tracemalloc.Filter(False, tracemalloc.__file__),
+               tracemalloc.Filter(False, __file__)]
+    stats = after.filter_traces(ignored).compare_to(
+        before.filter_traces(ignored), 'lineno')
+    result = {
+        'allocating': sum(c[0] for c in counts.values()) / ticks,
+        'update KiB': sum(c[1] for c in counts.values()) / 1024 / ticks,
+        'peak KiB': peak / 1024,
+        'net blocks': sum(s.count_diff for s in stats) / ticks,
+    }
+    if top:
+        result['objects'] = [
+            (name, count[0] / ticks) for name, count in
+            sorted(counts.items(), key=lambda c: -c[1][0])[:top]]
+        result['sites'] = [(str(s.traceback), s.count_diff / ticks)
+                           for s in stats[:top] if s.count_diff]
+    return result
+
+
+def compare(results, baseline, threshold):
+    '''Returns list of (scenario, column, baseline, current)'''
+    regressions = []
+    for name, columns in results.items():
+        for column in COLUMNS:
+            base = baseline.get(name, {}).get(column)
+            if base is None:
+                continue
+            # One allocation of slack for the columns at zero
+            if columns[column] > base * (1 + threshold) + 1:
+                regressions.append((name, column, base, columns[column]))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Allocation benchmark')
+    parser.add_argument('--scenario', action='append',
+                        choices=scenarios.SCENARIOS,
+                        help='run only these scenarios')
+    parser.add_argument('--ticks', type=int, default=TICKS)
+    parser.add_argument('--top', type=int, default=0,
+                        help='list the objects and lines allocating most')
+    parser.add_argument('--baseline', default=BASELINE)
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='allowed increase, 0.1 is 10%%')
+    parser.add_argument('--update-baseline', action='store_true')
+    args = parser.parse_args(argv)
+
+    display = headless.init_display()
+    names = args.scenario or list(scenarios.SCENARIOS)
+
+    results = {}
+    print('{:<16}'.format('per tick') +
+          ''.join('{:>14}'.format(c) for c in COLUMNS))
+    for name in names:
+        result = run_scenario(display, name, args.ticks, top=args.top)
+        print('{:<16}'.format(name) +
+              ''.join('{:>14.1f}'.format(result[c]) for c in COLUMNS))
+        for obj, count in result.pop('objects', []):
+            print('    {:<40}{:>10.1f}'.format(obj, count))
+        for site, count in result.pop('sites', []):
+            print('    {:<40}{:>10.1f}'.format(site, count))
+        results[name] = result
+
+    if args.update_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as file:
+                baseline = json.load(file)
+        baseline.update(results)
+        with open(args.baseline, 'w') as file:
+            json.dump(baseline, file, indent=2, sort_keys=True)
+            file.write('\n')
+        print('baseline written to {}'.format(args.baseline))
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print('no baseline at {}'.format(args.baseline))
+        return 0
+
+    with open(args.baseline) as file:
+        baseline = json.load(file)
+
+    regressions = compare(results, baseline, args.threshold)
+    for name, column, base, value in regressions:
+        print('REGRESSION {} {}: {:.1f} -> {:.1f}'.format(
+            name, column, base, value))
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,103 @@
+#!/usr/bin/python3
+'''
+Cold start benchmark, time from process start to the first presented
+frame of main.py, broken down by phase.
+
+Every run is a new interpreter started with -X importtime,
+the import phase is split by top level module from its report.
+
+    python3 benchmarks/coldstart.py
+    python3 benchmarks/coldstart.py --runs 10 --imports 8
+'''
+import os
+import sys
+import argparse
+import json
+import subprocess
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+# Runs in the child, prints the startup marks of main.py
+CHILD = '''
+import time
+start = time.time()
+begin = time.perf_counter()
+import main
+imported = time.perf_counter()
+main.main(frames=2)
+marks = [('imports', imported)] + main.startup_marks
+import json
+print(json.dumps({'start': start, 'begin': begin, 'marks': marks}))
+'''
+
+
+def parse_importtime(stderr):
+    '''
+    Returns {module: cumulative seconds} of the modules
+    imported by main.py itself
+    '''
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        parts = line[len('import time:'):].split('|')
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue  # header
+        name = parts[2]
+        # One extra space of indentation for every nested level
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        # Children are reported before their parent
+        if depth == 1:
+            modules[name.strip()] = int(parts[1]) / 1e6
+        elif depth == 0:
+            if name.strip() == 'main':
+                return modules
+            modules.clear()
+    return modules
+
+
+def run_once():
+    env = dict(os.environ)
+    env.setdefault('SDL_VIDEODRIVER', 'dummy')
+    env['PYGAME_HIDE_SUPPORT_PROMPT'] = '1'
+    launched = time.time()
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', CHILD],
+                          cwd=ROOT, env=env, capture_output=True,
+                          text=True, check=True)
+    report = json.loads(proc.stdout.strip().splitlines()[-1])
+
+    # Phases in seconds
+    phases = [('interpreter', report['start'] - launched)]
+    last = report['begin']
+    for name, mark in report['marks']:
+        phases.append((name, mark - last))
+        last = mark
+    return phases, parse_importtime(proc.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Cold start benchmark')
+    parser.add_argument('--runs', type=int, default=5,
+                        help='the fastest run is reported')
+    parser.add_argument('--imports', type=int, default=6,
+                        help='number of top level imports listed')
+    args = parser.parse_args(argv)
+
+    runs = [run_once() for i in range(args.runs)]
+    phases, modules = min(runs, key=lambda run: sum(t for n, t in run[0]))
+
+    print('{:<24}{:>10}'.format('phase', 'ms'))
+    for name, seconds in phases:
+        print('{:<24}{:>10.1f}'.format(name, seconds * 1000))
+        if name == 'imports':
+            slowest = sorted(modules.items(), key=lambda m: -m[1])
+            for module, seconds in slowest[:args.imports]:
+                print('  {:<22}{:>10.1f}'.format(module, seconds * 1000))
+    print('{:<24}{:>10.1f}'.format(
+        'total', sum(t for n, t in phases) * 1000))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
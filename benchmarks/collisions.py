@@ -0,0 +1,92 @@
+#!/usr/bin/python3
+'''
+Bullet vs enemy overlap test micro-benchmark,
+compares the per pair loop and the spatial hash
+with the numpy batch kernel
+and prints the points where the batch kernel starts winning.
+
+    python3 benchmarks/collisions.py
+'''
+import os
+import sys
+import random
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import gameobjects  # noqa: E402
+import controller  # noqa: E402
+
+
+class Box(gameobjects.GameObject):
+    def __init__(self, pos, size):
+        super(Box, self).__init__()
+        self.set_pos(pos)
+        self._size = size
+
+
+def make_boxes(count, size):
+    return [Box((random.uniform(0, 1280), random.uniform(0, 720)), size)
+            for i in range(count)]
+
+
+def loop_kernel(bullets, enemies):
+    for bullet in bullets:
+        for enemy in enemies:
+            if bullet.collides(enemy):
+                break
+
+
+def grid_kernel(bullets, enemies):
+    grid = controller.SpatialHash(controller.Collisions.CELL_SIZE)
+    grid.rebuild(enemies)
+    for bullet in bullets:
+        grid.query(bullet.get_rect())
+
+
+def batch_kernel(bullets, enemies):
+    hits = controller.overlap_matrix(controller.pack_boxes(bullets),
+                                     controller.pack_boxes(enemies))
+    controller.numpy.nonzero(hits)
+
+
+def best_of(func, *args):
+    number = 20
+    times = timeit.repeat(lambda: func(*args), number=number, repeat=5)
+    return min(times) / number
+
+
+def main():
+    if controller.numpy is None:
+        print('numpy is not installed')
+        return 1
+
+    random.seed(0)
+    enemies_count = 28  # wave_2 formation
+    crossover_loop = None
+    crossover_grid = None
+    print('{:>8} {:>8} {:>12} {:>12} {:>12}'.format(
+        'bullets', 'pairs', 'loop (us)', 'grid (us)', 'batch (us)'))
+    for bullets_count in (1, 2, 5, 10, 15, 20, 30, 50, 100, 200, 500):
+        bullets = make_boxes(bullets_count, (9, 54))
+        enemies = make_boxes(enemies_count, (52, 42))
+        loop = best_of(loop_kernel, bullets, enemies)
+        grid = best_of(grid_kernel, bullets, enemies)
+        batch = best_of(batch_kernel, bullets, enemies)
+        pairs = bullets_count * enemies_count
+        print('{:>8} {:>8} {:>12.1f} {:>12.1f} {:>12.1f}'.format(
+            bullets_count, pairs, loop * 1e6, grid * 1e6, batch * 1e6))
+        if crossover_loop is None and batch < loop:
+            crossover_loop = pairs
+        if crossover_grid is None and batch < grid:
+            crossover_grid = pairs
+
+    print('batch kernel beats the loop from {} pairs'.format(crossover_loop))
+    print('batch kernel beats the spatial hash from {} pairs '
+          '(Collisions.BATCH_MIN_PAIRS = {})'.format(
+              crossover_grid, controller.Collisions.BATCH_MIN_PAIRS))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,111 @@
+#!/usr/bin/python3
+'''
+Memory benchmark, size of the game objects with many of them alive.
+
+For every kind COUNT objects are created and kept alive,
+the memory traced by tracemalloc is divided by COUNT.
+Then COUNT objects of all the kinds mixed are updated and
+checked against each other, as in a tick.
+
+    python3 benchmarks/memory.py
+    python3 benchmarks/memory.py --count 100000
+'''
+import os
+import sys
+import argparse
+import gc
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import headless  # noqa: E402
+import gameobjects  # noqa: E402
+import controller  # noqa: E402
+
+COUNT = 50000
+DT = 1.0 / 60
+REPEATS = 3
+
+KINDS = {
+    'Bullet': gameobjects.Bullet,
+    'EBullet': gameobjects.EBullet,
+    'Enemy': gameobjects.Enemy,
+    'Meteor': gameobjects.MeteorBig,
+    'PowerupHealth': gameobjects.PowerupHealth,
+    'Explosion': gameobjects.Explosion,
+    'MovementLinear': lambda: gameobjects.MovementLinear(1, (0, 0),
+                                                         (100, 0)),
+    'MovmentClassic': gameobjects.MovmentClassic,
+    'ShooterPeriodic': gameobjects.ShooterPeriodic,
+}
+
+
+def create(kinds, count):
+    '''count objects, the kinds one after another'''
+    factories = list(kinds.values())
+    return [factories[i % len(factories)]() for i in range(count)]
+
+
+def measure_kind(factory, count):
+    '''Returns bytes per object'''
+    gc.collect()
+    tracemalloc.start()
+    start = tracemalloc.get_traced_memory()[0]
+    objects = [factory() for i in range(count)]
+    size = tracemalloc.get_traced_memory()[0] - start
+    tracemalloc.stop()
+    del objects
+    return size / count
+
+
+def measure_mixed(count):
+    '''Returns (MiB, update ms, collides ms) of count mixed objects'''
+    gc.collect()
+    tracemalloc.start()
+    start = tracemalloc.get_traced_memory()[0]
+    objects = create(KINDS, count)
+    size = tracemalloc.get_traced_memory()[0] - start
+    tracemalloc.stop()
+
+    # Only the objects moving on their own, the others need a child
+    movers = [obj for obj in objects
+              if isinstance(obj, gameobjects.SpriteGameObject)]
+    update = collides = None
+    for repeat in range(REPEATS):
+        begin = time.perf_counter()
+        for obj in movers:
+            obj.update(DT)
+        middle = time.perf_counter()
+        for a, b in zip(movers, movers[1:]):
+            a.collides(b)
+        end = time.perf_counter()
+        update = min(update or middle - begin, middle - begin)
+        collides = min(collides or end - middle, end - middle)
+    return size / 2 ** 20, update * 1000, collides * 1000
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Memory benchmark')
+    parser.add_argument('--count', type=int, default=COUNT)
+    args = parser.parse_args(argv)
+
+    headless.init_display()
+    # The objects are not in a world
+    gameobjects.WorldHelper.animator = controller.Animator()
+    gameobjects.WorldHelper.remove = lambda obj: None
+
+    print('{:<18}{:>14}{:>10}'.format('kind', 'bytes/object', '__dict__'))
+    for name, factory in KINDS.items():
+        size = measure_kind(factory, args.count)
+        print('{:<18}{:>14.0f}{:>10}'.format(
+            name, size, 'yes' if hasattr(factory(), '__dict__') else 'no'))
+
+    size, update, collides = measure_mixed(args.count)
+    print('{} mixed objects: {:.1f} MiB, update {:.1f}ms, '
+          'collides {:.1f}ms'.format(args.count, size, update, collides))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
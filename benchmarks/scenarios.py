@@ -0,0 +1,262 @@
+#!/usr/bin/python3
+'''
+Scenario benchmark suite,
+measures the per tick cost of Updater.update_world, Collisions.update,
+Animator.update and Render.draw for every scenario,
+writes the results to JSON and compares them with a baseline.
+
+    python3 benchmarks/scenarios.py
+    python3 benchmarks/scenarios.py --scenario wave_2 --scenario mode_3
+    python3 benchmarks/scenarios.py --update-baseline
+
+The phases are timed by the game's FrameTimer, render adds up
+background, objects and gui.
+
+Exits with 1 when a phase of a scenario got slower than the baseline
+by more than --threshold. Timings are compared relative to a fixed
+calibration workload run along with them, which evens out CPU speed
+but not everything else a machine changes (Python, pygame, SDL).
+Regenerate the baseline with --update-baseline on the machine
+running the gate.
+'''
+import os
+import sys
+import argparse
+import json
+import random
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import headless  # noqa: E402
+import gameobjects  # noqa: E402
+import controller  # noqa: E402
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BASELINE = os.path.join(BENCH_DIR, 'baseline.json')
+RESULTS = os.path.join(BENCH_DIR, 'results.json')
+
+PHASES = ('update_world', 'collisions', 'animator', 'render')
+# FrameTimer phases of Render.draw_frame
+RENDER_PHASES = ('background', 'objects', 'gui')
+DT = 1.0 / 60
+WARMUP_TICKS = 60
+TICKS = 600
+# Every scenario runs this many times, the fastest run is kept
+REPEATS = 3
+# Phases cheaper than this (ms) are never reported as regressions,
+# they are mostly timer noise
+NOISE_FLOOR = 0.02
+CALIBRATION_LOOPS = 200000
+
+
+def setup_wave(number):
+    def setup(display):
+        return headless.Simulation(display, number, number, render=True,
+                                   invulnerable=True)
+    return setup
+
+
+def setup_meteor_storm(display):
+    sim = headless.Simulation(display, 6, 6, render=True,
+                              invulnerable=True)
+    storm = gameobjects.MeteorGenerator(3600)
+    storm.set_interval(0.05)
+    sim.game.world.append(storm)
+    return sim
+
+
+def setup_mode_3(display):
+    sim = headless.Simulation(display, 2, 2, render=True,
+                              invulnerable=True)
+    sim.FIRE_INTERVAL = DT  # shoot every tick
+    for i in range(3):
+        sim.game.player.upgrade_shoot()
+    return sim
+
+
+def setup_explosions(display):
+    sim = headless.Simulation(display, 1, 1, render=True,
+                              invulnerable=True)
+    world = sim.game.world
+    for i in range(1000):
+        controller.create_explosion(world, (random.uniform(0, 1280),
+                                            random.uniform(0, 720)))
+    return sim
+
+
+# name: (setup, warmup ticks, measured ticks)
+SCENARIOS = {
+    'wave_1': (setup_wave(1), WARMUP_TICKS, TICKS),
+    'wave_2': (setup_wave(2), WARMUP_TICKS, TICKS),
+    'wave_3': (setup_wave(3), WARMUP_TICKS, TICKS),
+    'wave_4': (setup_wave(4), WARMUP_TICKS, TICKS),
+    'wave_5': (setup_wave(5), WARMUP_TICKS, TICKS),
+    'wave_6': (setup_wave(6), WARMUP_TICKS, TICKS),
+    'meteor_storm': (setup_meteor_storm, WARMUP_TICKS, TICKS),
+    'mode_3': (setup_mode_3, WARMUP_TICKS, TICKS),
+    # Explosions last 0.4s, measure the burst itself
+    'explosions_1000': (setup_explosions, 0, 20),
+}
+
+
+def run_once(display, name, seed):
+    setup, warmup, ticks = SCENARIOS[name]
+    random.seed(seed)
+    sim = setup(display)
+    timer = sim.game.timer
+
+    for i in range(warmup):
+        sim.tick(DT)
+
+    timer.set_enabled(True)
+    for i in range(ticks):
+        sim.tick(DT)
+        timer.end_frame()
+    totals = timer.totals
+    totals['render'] = sum(totals.get(p, 0) for p in RENDER_PHASES)
+
+    # ms per tick
+    result = {phase: totals.get(phase, 0) * 1000 / ticks
+              for phase in PHASES}
+    result['total'] = sum(result.values())
+    return result
+
+
+def run_scenario(display, name, seed=0, repeats=REPEATS):
+    runs = [run_once(display, name, seed) for i in range(repeats)]
+    return {phase: min(run[phase] for run in runs) for phase in runs[0]}
+
+
+def run_background(display, frames=300):
+    '''
+    Per frame cost of Background.draw: tiling with the alpha tile
+    (as before), tiling with the opaque tile and the pre-composited strip
+    '''
+    bg = gameobjects.ResourcesLoader.sprites['background']
+    cached = bg.cached
+    image = bg.image
+    result = {}
+    for name, mode in (('tiled_alpha', False), ('tiled', False),
+                       ('cached', True)):
+        bg.cached = mode
+        bg.image = image.convert_alpha() if name == 'tiled_alpha' else image
+        bg.draw(display, DT)  # builds the strip
+        best = None
+        for repeat in range(REPEATS):
+            start = time.perf_counter()
+            for i in range(frames):
+                bg.draw(display, DT)
+            elapsed = (time.perf_counter() - start) * 1000 / frames
+            best = elapsed if best is None else min(best, elapsed)
+        result[name] = best
+    bg.cached = cached
+    bg.image = image
+    return result
+
+
+def run_calibration(loops=CALIBRATION_LOOPS):
+    '''ms of a fixed interpreter workload, the fastest of REPEATS'''
+    best = None
+    for repeat in range(REPEATS):
+        start = time.perf_counter()
+        objects = {}
+        for i in range(loops):
+            objects[i % 1000] = (i * 0.5, i + 1.0)
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def speed_ratio(results, baseline):
+    '''How much slower this machine is than the baseline one'''
+    current = results.get('calibration', {}).get('ms')
+    base = baseline.get('calibration', {}).get('ms')
+    if not current or not base:
+        return 1
+    return current / base
+
+
+def compare(results, baseline, threshold):
+    '''Returns list of (scenario, phase, baseline ms, current ms)'''
+    ratio = speed_ratio(results, baseline)
+    regressions = []
+    for name, phases in results.items():
+        if name not in baseline or name == 'calibration':
+            continue
+        for phase, value in phases.items():
+            base = baseline[name].get(phase)
+            if base is None or value < NOISE_FLOOR:
+                continue
+            # The baseline as if measured on this machine
+            base *= ratio
+            if value > base * (1 + threshold):
+                regressions.append((name, phase, base, value))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Scenario benchmarks')
+    parser.add_argument('--scenario', action='append', choices=SCENARIOS,
+                        help='run only these scenarios')
+    parser.add_argument('--output', default=RESULTS)
+    parser.add_argument('--baseline', default=BASELINE)
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='allowed slowdown, 0.25 is 25%%')
+    parser.add_argument('--update-baseline', action='store_true')
+    args = parser.parse_args(argv)
+
+    display = headless.init_display()
+    names = args.scenario or list(SCENARIOS)
+
+    results = {'calibration': {'ms': run_calibration()}}
+    print('{:<16}'.format('ms per tick') +
+          ''.join('{:>14}'.format(p) for p in PHASES + ('total',)))
+    for name in names:
+        results[name] = run_scenario(display, name)
+        print('{:<16}'.format(name) +
+              ''.join('{:>14.3f}'.format(results[name][p])
+                      for p in PHASES + ('total',)))
+
+    results['background'] = run_background(display)
+    print('background per frame: {tiled_alpha:.3f}ms tiled alpha tile, '
+          '{tiled:.3f}ms tiled, {cached:.3f}ms cached strip'.format(
+              **results['background']))
+
+    with open(args.output, 'w') as file:
+        json.dump(results, file, indent=2, sort_keys=True)
+
+    if args.update_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as file:
+                baseline = json.load(file)
+        baseline.update(results)
+        with open(args.baseline, 'w') as file:
+            json.dump(baseline, file, indent=2, sort_keys=True)
+            file.write('\n')
+        print('baseline written to {}'.format(args.baseline))
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print('no baseline at {}'.format(args.baseline))
+        return 0
+
+    with open(args.baseline) as file:
+        baseline = json.load(file)
+
+    if 'calibration' not in baseline:
+        print('baseline has no calibration, timings compared as they are')
+    else:
+        print('calibration took {:.2f}x its baseline time'.format(
+            speed_ratio(results, baseline)))
+
+    regressions = compare(results, baseline, args.threshold)
+    for name, phase, base, value in regressions:
+        print('REGRESSION {} {}: {:.3f}ms -> {:.3f}ms (+{:.0f}%)'.format(
+            name, phase, base, value, (value / base - 1) * 100))
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
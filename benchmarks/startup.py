@@ -0,0 +1,73 @@
+#!/usr/bin/python3
+'''
+Sprite loading cost at startup for each ResourcesLoader mode:
+the compiled cache, serial decoding, parallel decoding and lazy decoding.
+
+"first wave" is ResourcesLoader.__init__ plus every sprite needed to draw
+the first frame of wave 1, "all" adds every other sprite.
+
+    python3 benchmarks/startup.py
+'''
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import headless  # noqa: E402
+import gameobjects  # noqa: E402
+from levels import Waves  # noqa: E402
+
+REPEATS = 10
+FIRST_FRAME = ['background', 'player'] + Waves.sprites_of(1)
+
+# name: (USE_CACHE, PARALLEL, LAZY)
+MODES = {
+    'cache': (True, False, False),
+    'serial': (False, False, False),
+    'parallel': (False, True, False),
+    'lazy': (False, False, True),
+}
+
+
+def run_once(use_cache, parallel, lazy):
+    loader = gameobjects.ResourcesLoader
+    loader.USE_CACHE = use_cache
+    loader.PARALLEL = parallel
+    loader.LAZY = lazy
+
+    start = time.perf_counter()
+    loader.__init__()
+    for name in FIRST_FRAME:
+        loader.sprites[name]
+    first_wave = time.perf_counter() - start
+
+    names = [entry[0] for entry in loader.read_list(loader.LIST_PATH)]
+    for name in names:
+        loader.sprites[name]
+    return first_wave, time.perf_counter() - start
+
+
+def main():
+    headless.init_display()
+    loader = gameobjects.ResourcesLoader
+    defaults = (loader.USE_CACHE, loader.PARALLEL, loader.LAZY)
+
+    # Builds the cache, so the cache mode measures a hit
+    loader.__init__()
+    # Starts the pool, it is reused for the whole run
+    loader.get_executor()
+
+    print('{:<10}{:>16}{:>12}'.format('ms', 'first wave', 'all'))
+    for name, mode in MODES.items():
+        runs = [run_once(*mode) for i in range(REPEATS)]
+        print('{:<10}{:>16.3f}{:>12.3f}'.format(
+            name, min(r[0] for r in runs) * 1000,
+            min(r[1] for r in runs) * 1000))
+
+    loader.USE_CACHE, loader.PARALLEL, loader.LAZY = defaults
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,124 @@
+#!/usr/bin/python3
+'''
+World container benchmark,
+cost of append, remove and a full iteration with many live objects,
+compared with the previous list based storage.
+
+    python3 benchmarks/world.py
+'''
+import os
+import sys
+import random
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import gameobjects  # noqa: E402
+import controller  # noqa: E402
+
+SIZES = (5000, 20000, 50000)
+# Objects spawned and despawned while the world holds SIZE objects
+CHURN = 500
+
+
+class ListWorld:
+    '''The previous World storage, for comparison'''
+    def __init__(self):
+        self._objects = {}
+        self._all_objects = []
+
+    def append(self, object):
+        bucket = self._objects.setdefault(object.OBJECT_TYPE, [])
+        if object not in bucket:
+            bucket.append(object)
+        if object not in self._all_objects:
+            self._all_objects.append(object)
+
+    def remove(self, object):
+        self._objects[object.OBJECT_TYPE].remove(object)
+        self._all_objects.remove(object)
+
+    def begin_deferred(self):
+        pass
+
+    def end_deferred(self):
+        pass
+
+    def get_all_objects(self):
+        return self._all_objects
+
+
+class Bullet(gameobjects.GameObject):
+    OBJECT_TYPE = 'bullet'
+
+
+class Enemy(gameobjects.GameObject):
+    OBJECT_TYPE = 'enemy'
+
+
+def fill(world, size):
+    for i in range(size):
+        world.append(Bullet() if i % 2 else Enemy())
+
+
+def measure(world, size):
+    # Existing objects are prepared outside the timing,
+    # the old storage needs O(n^2) to fill the bigger sizes
+    if isinstance(world, ListWorld):
+        objs = [Bullet() if i % 2 else Enemy() for i in range(size)]
+        world._all_objects = list(objs)
+        world._objects = {'bullet': objs[1::2], 'enemy': objs[0::2]}
+    else:
+        fill(world, size)
+
+    churn = [Bullet() for i in range(CHURN)]
+    random.shuffle(churn)
+
+    start = time.perf_counter()
+    for obj in churn:
+        world.append(obj)
+    append = (time.perf_counter() - start) / CHURN
+
+    random.shuffle(churn)
+    start = time.perf_counter()
+    # As in a tick, removes are applied at the sync point
+    world.begin_deferred()
+    for obj in churn:
+        world.remove(obj)
+    world.end_deferred()
+    remove = (time.perf_counter() - start) / CHURN
+
+    start = time.perf_counter()
+    for obj in world.get_all_objects():
+        pass
+    iterate = time.perf_counter() - start
+
+    return append, remove, iterate
+
+
+def main():
+    random.seed(0)
+    print('{:>8} {:>10} {:>14} {:>14} {:>14}'.format(
+        'objects', 'storage', 'append (us)', 'remove (us)', 'iterate (ms)'))
+    for size in SIZES:
+        for name, world in (('list', ListWorld()),
+                            ('ObjectSet', controller.World())):
+            append, remove, iterate = measure(world, size)
+            print('{:>8} {:>10} {:>14.2f} {:>14.2f} {:>14.2f}'.format(
+                size, name, append * 1e6, remove * 1e6, iterate * 1e3))
+
+    world = controller.World()
+    fill(world, SIZES[-1])
+    world.get_by_class(Bullet)
+    start = time.perf_counter()
+    for i in range(CHURN):
+        obj = Bullet()
+        world.append(obj)
+        world.remove(obj)
+    churn = (time.perf_counter() - start) / CHURN
+    print('append + remove with a class index: {:.2f} us'.format(churn * 1e6))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
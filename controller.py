@@ -7,10 +7,17 @@ from pygame.locals import (
     KEYDOWN,
     KEYUP
 )
-import datetime
+import time
 import random
+import heapq
+try:
+    import numpy
+except ImportError:
+    numpy = None
 import Randomizer
+from TextDebugger import FrameTimer
 from levels import Waves
+from projectiles import ProjectileSystem
 
 
 class Input():
@@ -33,51 +40,222 @@ class Input():
             self._events_pressed[key_code]()
 
 
+class ObjectSet:
+    '''
+    Insertion ordered container with O(1) append, remove and lookup.
+    Removed slots are left as holes until compact, which World.flush
+    calls at every sync point, so iteration is over a plain list.
+    Iterating while modifying is allowed, a loop walks the objects
+    as they were when it started.
+    '''
+
+    def __init__(self):
+        self._items = []
+        # Key: Object
+        # Value: slot in _items
+        self._index = {}
+        self._holes = 0
+        self._first_hole = 0
+        # True when _items was handed to an iterator,
+        # it is copied before being modified
+        self._shared = False
+
+    def __len__(self):
+        return len(self._index)
+
+    def __contains__(self, obj):
+        return obj in self._index
+
+    def __iter__(self):
+        if self._holes > 0:
+            self.compact()
+        self._shared = True
+        return iter(self._items)
+
+    def __getitem__(self, i):
+        if self._holes > 0:
+            self.compact()
+        return self._items[i]
+
+    def _own(self):
+        if self._shared:
+            self._items = self._items[:]
+            self._shared = False
+
+    def append(self, obj):
+        if obj not in self._index:
+            self._own()
+            self._index[obj] = len(self._items)
+            self._items.append(obj)
+
+    def remove(self, obj):
+        if obj not in self._index:
+            raise ValueError('ObjectSet.remove(x): x not in set')
+        self._own()
+        slot = self._index.pop(obj)
+        self._items[slot] = None
+        if self._holes == 0 or slot < self._first_hole:
+            self._first_hole = slot
+        self._holes += 1
+
+    def compact(self):
+        '''Fills the holes, only the slots after the first one move'''
+        if self._holes == 0:
+            return
+        first = self._first_hole
+        items = self._items
+        # New list, running iterators keep the old one
+        self._items = items[:first] + [obj for obj in items[first:]
+                                       if obj is not None]
+        index = self._index
+        for i in range(first, len(self._items)):
+            index[self._items[i]] = i
+        self._holes = 0
+        self._shared = False
+
+    def clear(self):
+        self._items = []
+        self._index.clear()
+        self._holes = 0
+        self._shared = False
+
+
 class World():
     def __init__(self):
         # Key: Object type string
-        # Value: Object
+        # Value: ObjectSet
         self._objects = {}
 
         # Contains all objects
-        self._all_objects = []
+        self._all_objects = ObjectSet()
+
+        # Key: Class
+        # Value: ObjectSet of instances of the class and its subclasses
+        self._classes = {}
+        # Key: Concrete class
+        # Value: list of _classes sets an instance belongs to
+        self._class_routes = {}
+
+        self.pool = gameobjects.ObjectPool()
+
+        # Command buffer, while deferring appends and removes are queued
+        # as (is_append, object) and applied by flush
+        self._defer_depth = 0
+        self._commands = []
+        self._removing = set()
 
         gameobjects.WorldHelper.append = self.append
         gameobjects.WorldHelper.remove = self.remove
+        gameobjects.WorldHelper.flush = self.flush
+        gameobjects.WorldHelper.pool = self.pool
 
-    def append(self, object):
-        type_name = object.OBJECT_TYPE
-        self._append_dic(type_name, object, self._objects)
-        self._append_list(object, self._all_objects)
+    def begin_deferred(self):
+        '''
+        Queues appends and removes until the matching end_deferred,
+        can be nested
+        '''
+        self._defer_depth += 1
 
-    def _append_dic(self, key, value, dic):
-        if key in dic:
-            self._append_list(value, dic[key])
+    def end_deferred(self):
+        self._defer_depth -= 1
+        if self._defer_depth == 0:
+            self.flush()
+
+    def flush(self):
+        '''
+        Sync point, applies queued commands in order.
+        Commands queued by remove events are applied as well.
+        '''
+        removed = False
+        while len(self._commands) > 0:
+            commands = self._commands
+            self._commands = []
+            for is_append, object in commands:
+                if is_append:
+                    self._append_now(object)
+                else:
+                    self._removing.discard(object)
+                    if object in self._all_objects:
+                        self._remove_now(object)
+                        removed = True
+
+        if removed:
+            # The loops of the next tick get lists without holes
+            self._all_objects.compact()
+            for objects in self._objects.values():
+                objects.compact()
+            for index in self._classes.values():
+                index.compact()
+
+    def is_removing(self, object):
+        '''True when a remove of object is queued'''
+        return object in self._removing
+
+    def append(self, object):
+        if self._defer_depth > 0:
+            self._commands.append((True, object))
         else:
-            dic[key] = []
-            self._append_list(value, dic[key])
+            self._append_now(object)
+
+    def _append_now(self, object):
+        self.pool.take(object)
+        if object in self._all_objects:
+            return
+
+        self._bucket(object.OBJECT_TYPE).append(object)
+        self._all_objects.append(object)
+        for index in self._routes(type(object)):
+            index.append(object)
+
+    def _bucket(self, type_name):
+        if type_name not in self._objects:
+            self._objects[type_name] = ObjectSet()
+        return self._objects[type_name]
 
-    def _append_list(self, value, list):
-        if value not in list:
-            list.append(value)
+    def _routes(self, type):
+        if type not in self._class_routes:
+            self._class_routes[type] = [
+                index for cls, index in self._classes.items()
+                if issubclass(type, cls)]
+        return self._class_routes[type]
 
     def get_all_objects(self):
         return self._all_objects
 
     def remove(self, object):
+        if self._defer_depth > 0:
+            # Removing twice in the same batch is a no-op
+            if object not in self._removing:
+                self._removing.add(object)
+                self._commands.append((False, object))
+        else:
+            self._remove_now(object)
+
+    def _remove_now(self, object):
         object.on_world_remove()
-        g = self._objects[object.OBJECT_TYPE]
-        g.remove(object)
+        self._objects[object.OBJECT_TYPE].remove(object)
         self._all_objects.remove(object)
+        for index in self._routes(type(object)):
+            index.remove(object)
+        self.pool.release(object)
 
     def get_by_type(self, type):
-        type_name = type.OBJECT_TYPE
-        if type_name not in self._objects:
-            # Create the requested type_name and
-            # return it as an empty array
-            self._objects[type_name] = []
-            return self._objects[type_name]
-        return self._objects[type_name]
+        return self._bucket(type.OBJECT_TYPE)
+
+    def get_by_class(self, cls):
+        '''
+        Returns all instances of cls and its subclasses,
+        unlike get_by_type which only matches OBJECT_TYPE.
+        The index is kept up to date from the first call on.
+        '''
+        if cls not in self._classes:
+            index = ObjectSet()
+            for obj in self._all_objects:
+                if isinstance(obj, cls):
+                    index.append(obj)
+            self._classes[cls] = index
+            self._class_routes.clear()
+        return self._classes[cls]
 
     def get_main_dic(self):
         return self._objects
@@ -89,8 +267,13 @@ class World():
         for obj in self._all_objects:
             obj.on_removed_event.clear()
 
-        self._objects.clear()
+        self._commands.clear()
+        self._removing.clear()
+        for bucket in self._objects.values():
+            bucket.clear()
         self._all_objects.clear()
+        for index in self._classes.values():
+            index.clear()
 
 
 class Controller:
@@ -100,6 +283,7 @@ class Controller:
     DEBUG4 = ']'
     DEBUG5 = '['
     DEBUG6 = 'm'
+    DEBUG7 = 't'
     PAUSE = 'p'
     RESET = 'r'
     LOSE = 'l'
@@ -119,6 +303,7 @@ class Controller:
         self.register_key(self.DEBUG4, self.inc_sim_speed)
         self.register_key(self.DEBUG5, self.dec_sim_speed)        
         self.register_key(self.DEBUG6, self.test)
+        self.register_key(self.DEBUG7, self.toggle_timer)
         self.mouse = Input()
         self.mouse.register_pressed(1, self._player.shoot)
 
@@ -139,6 +324,10 @@ class Controller:
     def dec_sim_speed(self):
         self._updater.time_scale /= 2
 
+    def toggle_timer(self):
+        timer = self._game.timer
+        timer.set_enabled(not timer.enabled)
+
     def test(self):
         mg = gameobjects.MeteorGenerator(10)
         mg.interval = 0.5
@@ -147,7 +336,7 @@ class Controller:
 
 
 def create_explosion(world, pos):
-    exp = gameobjects.Explosion()
+    exp = gameobjects.Explosion.acquire()
     world.append(exp)
     exp.set_pos(pos)
 
@@ -158,17 +347,112 @@ def drop_powerup(world, pos):
         type = [gameobjects.PowerupHealth,
                 gameobjects.PowerupWeapon,
                 gameobjects.PowerupShield][rand_type]
-        pu = type()
+        pu = type.acquire()
         world.append(pu)
         pu.set_pos(pos)
 
 
+class SpatialHash:
+    '''
+    Uniform grid broadphase,
+    objects are bucketed into every cell their rect touches
+    '''
+    def __init__(self, cell_size):
+        self.cell_size = cell_size
+        # Key: (cell_x, cell_y)
+        # Value: list of (order, object, rect)
+        self._cells = {}
+
+    def clear(self):
+        self._cells.clear()
+
+    def _cells_of(self, rect):
+        cs = self.cell_size
+        return (rect.left // cs, rect.top // cs,
+                (rect.right - 1) // cs, (rect.bottom - 1) // cs)
+
+    def rebuild(self, objects):
+        self.clear()
+        cells = self._cells
+        order = 0
+        for obj in objects:
+            rect = obj.get_rect()
+            entry = (order, obj, rect)
+            order += 1
+            x1, y1, x2, y2 = self._cells_of(rect)
+            for cx in range(x1, x2 + 1):
+                for cy in range(y1, y2 + 1):
+                    key = (cx, cy)
+                    if key in cells:
+                        cells[key].append(entry)
+                    else:
+                        cells[key] = [entry]
+
+    def query(self, rect):
+        '''
+        Returns objects colliding with rect,
+        in the same order they were passed to rebuild
+        '''
+        cells = self._cells
+        x1, y1, x2, y2 = self._cells_of(rect)
+        if x1 == x2 and y1 == y2:
+            found = cells.get((x1, y1), ())
+        else:
+            # Objects spanning several cells are found more than once
+            unique = {}
+            for cx in range(x1, x2 + 1):
+                for cy in range(y1, y2 + 1):
+                    for entry in cells.get((cx, cy), ()):
+                        unique[entry[0]] = entry
+            found = [unique[order] for order in sorted(unique)]
+
+        return [obj for _, obj, obj_rect in found
+                if obj_rect.colliderect(rect)]
+
+
+def pack_boxes(objects):
+    '''
+    Packs collision boxes of objects into an (n, 4) array
+    of left, top, right, bottom, truncated the same way pygame.Rect does
+    '''
+    boxes = numpy.array([obj.collision_box() for obj in objects],
+                        dtype=float).reshape(-1, 4)
+    x, y, w, h = boxes.T
+    left = numpy.trunc(x - w / 2)
+    top = numpy.trunc(y - h / 2)
+    w = numpy.trunc(w)
+    h = numpy.trunc(h)
+    # pygame never reports a collision for an empty rect
+    empty = (w == 0) | (h == 0)
+    w[empty] = numpy.nan
+    return numpy.stack((left, top, left + w, top + h), axis=1)
+
+
+def overlap_matrix(boxes_a, boxes_b):
+    '''
+    Returns (n, m) boolean matrix,
+    True where box n of boxes_a collides with box m of boxes_b
+    '''
+    a = boxes_a[:, None, :]
+    b = boxes_b[None, :, :]
+    return ((a[..., 0] < b[..., 2]) & (b[..., 0] < a[..., 2]) &
+            (a[..., 1] < b[..., 3]) & (b[..., 1] < a[..., 3]))
+
+
 class Collisions:
     '''
     Handles events of main gameobjects collisions
     '''
+    # Spatial hash cell size in pixels,
+    # about the size of the biggest enemy works best
+    CELL_SIZE = 128
+    # Use the numpy kernel when bullets * enemies reaches this,
+    # see benchmarks/collisions.py for the crossover point
+    BATCH_MIN_PAIRS = 300
+
     def __init__(self, world, game_state):
         self._world = world
+        self._grid = SpatialHash(self.CELL_SIZE)
         self._player = world.get_by_type(gameobjects.Player)[0]
         self._bullets = world.get_by_type(gameobjects.Bullet)
         self._enemies = world.get_by_type(gameobjects.Enemy)
@@ -178,25 +462,103 @@ class Collisions:
         self._game_state = game_state
 
     def check_list(self, obj, list, callback, only_one=True):
+        removing = self._world.is_removing
         for offender in list:
+            if removing(obj):
+                break
+            if removing(offender):
+                continue
             if obj.collides(offender):
                 callback(obj, offender)
                 if only_one:
                     break
 
-    def on_enemy_bullet(self, bullet, enemy):
-        self._world.remove(bullet)
-        if enemy.take_damage(bullet.DAMAGE):
+    def check_grid(self, obj, callback, only_one=True):
+        '''Same as check_list, against objects in the spatial hash'''
+        for offender in self._grid.query(obj.get_rect()):
+            if self._world.is_removing(offender):
+                continue
+            callback(obj, offender)
+            if only_one:
+                break
+
+    def check_batch(self, objs, others, callback, only_one=True):
+        '''
+        Same as calling check_list for every obj in objs,
+        with all the overlap tests done in one numpy call
+        '''
+        objs = list(objs)
+        others = list(others)
+        hits = overlap_matrix(pack_boxes(objs), pack_boxes(others))
+        rows, cols = numpy.nonzero(hits)  # row major, same order as loops
+
+        last_row = -1
+        for row, col in zip(rows.tolist(), cols.tolist()):
+            if only_one and row == last_row:
+                continue
+            offender = others[col]
+            if self._world.is_removing(offender):
+                continue
+            callback(objs[row], offender)
+            last_row = row
+
+    def damage_enemy(self, enemy, damage):
+        if enemy.take_damage(damage):
             self._world.remove(enemy)
             self._player.score += enemy.SCORE
 
-            create_explosion(self._world, enemy.get_pos())
-            drop_powerup(self._world, enemy.get_pos())
+            create_explosion(self._world, enemy.pos_view())
+            drop_powerup(self._world, enemy.pos_view())
+
+    def damage_player(self, damage):
+        if self._player.take_damage(damage):
+            self._game_state.on_lost()
+
+    def on_enemy_bullet(self, bullet, enemy):
+        self._world.remove(bullet)
+        self.damage_enemy(enemy, bullet.DAMAGE)
 
     def on_player_bullet(self, player, bullet):
         self._world.remove(bullet)
-        if player.take_damage(bullet.DAMAGE):
-            self._game_state.on_lost()
+        self.damage_player(bullet.DAMAGE)
+
+    def check_projectiles(self):
+        '''
+        Same checks as for Bullet and EBullet objects,
+        against the buffers of the ProjectileSystem
+        '''
+        system = gameobjects.WorldHelper.projectiles
+        if system is None:
+            return
+
+        friendly = system.friendly
+        if friendly.count > 0 and len(self._enemies) > 0:
+            enemies = list(self._enemies)
+            hits = overlap_matrix(system.boxes(friendly),
+                                  pack_boxes(enemies))
+            rows, cols = numpy.nonzero(hits)
+
+            used = []
+            for row, col in zip(rows.tolist(), cols.tolist()):
+                if len(used) > 0 and used[-1] == row:
+                    continue
+                enemy = enemies[col]
+                if self._world.is_removing(enemy):
+                    continue
+                used.append(row)
+                self.damage_enemy(enemy, float(friendly.damage[row]))
+            friendly.kill(used)
+
+        hostile = system.hostile
+        if hostile.count > 0:
+            player_box = pack_boxes([self._player])[0]
+            used = system.hits(hostile, player_box)
+            damage = hostile.damage[used].tolist()
+            hostile.kill(used)
+            for d in damage:
+                if self._world.is_removing(self._player):
+                    break
+                self.damage_player(d)
 
     def on_powerup(self, player, p):
         self._player.on_powerup(p)
@@ -209,9 +571,21 @@ class Collisions:
         self._game_state.on_lost()
 
     def update(self):
+        # Removes are queued, so the lists are not modified while
+        # iterating and killed objects are skipped through is_removing
+        self._world.begin_deferred()
+
         # Check if enemy is hit
-        for bullet in self._bullets:
-            self.check_list(bullet, self._enemies, self.on_enemy_bullet)
+        pairs = len(self._bullets) * len(self._enemies)
+        if numpy is not None and pairs >= self.BATCH_MIN_PAIRS:
+            self.check_batch(self._bullets, self._enemies,
+                             self.on_enemy_bullet)
+        elif pairs > 0:
+            self._grid.rebuild(self._enemies)
+            for bullet in self._bullets:
+                self.check_grid(bullet, self.on_enemy_bullet)
+
+        self.check_projectiles()
 
         # Check if player is hit
         self.check_list(self._player, self._e_bullets,
@@ -226,6 +600,8 @@ class Collisions:
         # Check player hitting meteor
         self.check_list(self._player, self._meteors, self.on_player_meteor)
 
+        self._world.end_deferred()
+
 
 class EnemySpwaner:
     LOWER_LIMIT = 720
@@ -237,16 +613,41 @@ class EnemySpwaner:
 
         self.enemies = []
         self.next_wave_index = 1
+        self.first_wave = 1
+        self.last_wave = None
+        self.waves_spawned = 0
         self.spawn_wave()
 
+    def set_wave_range(self, first, last=None):
+        '''
+        Restarts from wave first,
+        waves after last start over from first
+        '''
+        self.first_wave = first
+        self.last_wave = last
+        self.next_wave_index = first
+        self.kill_wave()
+
     def spawn_wave(self):
+        self.next_wave_index = self.upcoming_wave()
+
         enemies = Waves.create_wave(self.next_wave_index, self._player)
 
         if len(enemies) > 0:
             for etemp in enemies:
                 self._add_enemy_temp(etemp)
+            self.waves_spawned += 1
 
         self.next_wave_index += 1
+        gameobjects.ResourcesLoader.prefetch(
+            Waves.sprites_of(self.upcoming_wave()))
+
+    def upcoming_wave(self):
+        '''Number of the wave spawn_wave creates next'''
+        if self.last_wave is not None and \
+           self.next_wave_index > self.last_wave:
+            return self.first_wave
+        return self.next_wave_index
 
     def on_child_removed(self, child):
         self.enemies.remove(child)
@@ -280,69 +681,95 @@ class EnemySpwaner:
 
 
 class Animator():
+    '''
+    Clock driven animations, every object stores when its animation
+    started and its own fps, the frame is computed from the clock
+    when drawn (SpriteGameObject.frame).
+    One time animations end from a min-heap of end times,
+    so a tick only costs the animations that finished.
+    '''
     def __init__(self):
-        self._objects_loop = []  # Keep animating
-        self._objects_onetime = {}  # {object, callback}
+        self.time = 0
+        self._objects_loop = set()  # Keep animating
+        self._objects_onetime = {}  # {object: (callback, sequence)}
+        # (end time, sequence, object), entries whose sequence no longer
+        # matches _objects_onetime were removed and are skipped
+        self._ends = []
+        self._sequence = 0
 
     def update(self, delta_time):
-        for obj in self._objects_loop:
-            self._update_obj(obj, delta_time)
-
-        to_remove = []
-        for obj, callback in self._objects_onetime.items():
-            if self._update_obj(obj, delta_time):
-                to_remove.append(obj)
-                callback()
-
-        for r in to_remove:
-            del self._objects_onetime[r]
-
-    def _update_obj(self, obj, delta_time):
-        '''
-        Returns True when replaying.
-        '''
-        asprite = obj.sprite
-        fps = asprite.fps
-        obj.internal_frame += delta_time * fps
-        if obj.internal_frame >= 1:
-            delta_frames = int(obj.internal_frame)
-            obj.internal_frame -= delta_frames
-            obj.frame += delta_frames
-            if obj.frame >= asprite.frames_count:
-                obj.frame %= asprite.frames_count
-                return True
-        return False
-
-    def add_object_loop(self, object):
+        self.time += delta_time
+
+        ends = self._ends
+        while ends and ends[0][0] <= self.time:
+            end, sequence, obj = heapq.heappop(ends)
+            entry = self._objects_onetime.get(obj)
+            if entry is None or entry[1] != sequence:
+                continue
+            del self._objects_onetime[obj]
+            obj.stop_animation()
+            entry[0]()
+
+    def add_object_loop(self, object, fps=None):
         if object not in self._objects_loop:
-            object.internal_frame = 0
-            self._objects_loop.append(object)
+            object.start_animation(self, fps, True)
+            self._objects_loop.add(object)
 
     def remove_object(self, object):
-        if object in self._objects_loop:
-            self._objects_loop.remove(object)
+        '''Stops the animation, keeping the current frame'''
+        if object in self._objects_loop or object in self._objects_onetime:
+            self._objects_loop.discard(object)
+            self._objects_onetime.pop(object, None)
+            object.stop_animation()
 
-    def add_object_onetime(self, object, callback):
+    def add_object_onetime(self, object, callback, fps=None):
         if object not in self._objects_onetime:
-            object.internal_frame = 0
-            self._objects_onetime[object] = callback
+            object.start_animation(self, fps, False)
+            self._sequence += 1
+            self._objects_onetime[object] = (callback, self._sequence)
+            heapq.heappush(self._ends, (object.animation_end(),
+                                        self._sequence, object))
 
     def clear(self):
+        for object in self._objects_loop:
+            object.stop_animation()
+        for object in self._objects_onetime:
+            object.stop_animation()
         self._objects_loop.clear()
         self._objects_onetime.clear()
+        self._ends.clear()
 
 
 class Updater:
     FPS_LIMIT = 60
+    # Fixed step mode settings
+    TICK_RATE = 120
+    MAX_SUBSTEPS = 8
 
     def __init__(self, game):
         self.game = game
-        self._lastdt = datetime.datetime.now()
+        self._last_time = time.perf_counter()
         self.clock = pygame.time.Clock()
         self.time_scale = 1
 
+        # When fixed_step is on, the world advances in ticks of
+        # 1 / tick_rate seconds, at most max_substeps per frame
+        self.fixed_step = False
+        self.tick_rate = self.TICK_RATE
+        self.max_substeps = self.MAX_SUBSTEPS
+        self.interpolate = True
+        self._accumulator = 0
+        # Render interpolation between the last two ticks
+        self.alpha = 1
+        self.previous_positions = {}
+
     def pygame_events(self, controller):
-        for event in pygame.event.get():
+        timer = self.game.timer
+        t = timer.start()
+        events = pygame.event.get()
+        timer.stop('events', t)
+
+        for event in events:
             if event.type == QUIT:
                 return False
             elif event.type == MOUSEBUTTONDOWN:
@@ -355,69 +782,341 @@ class Updater:
 
         return True
 
-    def update_world(self, delta_time):
+    def update_objects(self, delta_time):
         for gobj in self.game.world.get_all_objects():
             gobj.update(delta_time)
 
+    def update_world(self, delta_time):
+        world = self.game.world
+        timer = self.game.timer
+
+        t = timer.start()
+        world.begin_deferred()
+        self.update_objects(delta_time)
+        world.flush()
+        timer.stop('update_world', t)
+
+        t = timer.start()
         self.game.collisions.update()
+        world.end_deferred()
+        timer.stop('collisions', t)
+
+    def step_world(self, delta_time):
+        '''
+        Advances the world by delta_time (already scaled),
+        in fixed ticks when fixed_step is on
+        '''
+        if not self.fixed_step:
+            self.update_world(delta_time)
+            return
+
+        step = 1.0 / self.tick_rate
+        self._accumulator += delta_time
+        steps = min(int(self._accumulator / step), self.max_substeps)
+        for i in range(steps):
+            if self.interpolate and i == steps - 1:
+                self._store_positions()
+            self.update_world(step)
+        self._accumulator -= steps * step
+
+        if self._accumulator >= step:
+            # Out of substeps, drop the backlog
+            # instead of falling behind more every frame
+            self._accumulator %= step
+
+        self.alpha = self._accumulator / step if self.interpolate else 1
+
+    def _store_positions(self):
+        # The vectors of the last store are reused
+        last = self.previous_positions
+        positions = {}
+        for obj in self.game.world.get_all_objects():
+            if not obj.INTERPOLATE:
+                continue
+            pos = last.get(obj)
+            if pos is None:
+                pos = obj.get_pos()
+            else:
+                pos.update(obj.pos_view())
+            positions[obj] = pos
+        self.previous_positions = positions
 
     def update_all(self, paused):
-        tnow = datetime.datetime.now()
-        dt = (tnow - self._lastdt).total_seconds()
-        self._lastdt = tnow
+        tnow = time.perf_counter()
+        dt = tnow - self._last_time
+        self._last_time = tnow
 
         if not paused:
-            self.update_world(dt * self.time_scale)
+            self.step_world(dt * self.time_scale)
 
+        timer = self.game.timer
+        t = timer.start()
         self.game.gui.update()
-        pygame.display.update()
+        timer.stop('gui', t)
+
+        t = timer.start()
+        if self.game.dirty_rects is None:
+            pygame.display.update()
+        else:
+            pygame.display.update(self.game.dirty_rects)
+            self.game.dirty_rects = None
+        timer.stop('display_update', t)
 
         self.clock.tick(Updater.FPS_LIMIT)
         return dt
 
 
+def merge_rects(rects):
+    '''Unions overlapping rects, returns a new list'''
+    merged = []
+    for rect in sorted(rects, key=lambda r: r.x):
+        for m in merged:
+            if m.colliderect(rect):
+                m.union_ip(rect)
+                break
+        else:
+            merged.append(pygame.rect.Rect(rect))
+    return merged
+
+
 class Render:
+    # Dirty rect mode falls back to a full update
+    # when the dirty area is more than this fraction of the screen
+    # or there are more than MAX_DIRTY_RECTS rects to restore,
+    # the scrolled details of the background included
+    FULL_UPDATE_RATIO = 0.5
+    MAX_DIRTY_RECTS = 256
+
     def __init__(self, game, display):
         self.bg = gameobjects.ResourcesLoader.sprites['background']
         self.game = game
         self.display = display
 
-    def draw(self, deltatime):
+        # Dirty rect mode, only the regions that changed are restored
+        # from the background layer and passed to display.update.
+        # The background layer is redrawn whenever it scrolls
+        # by a pixel, only the details of the tile (Background.
+        # scrolled_rects) are updated for the scroll
+        self.dirty_mode = False
+        self._bg_layer = None
+        self._bg_offset = None
+        self._last_rects = []
+        self._scrolled_rects = []
+        # Drawn last every frame, like the debug text
+        self._overlays = []
+
+    def add_overlay(self, draw):
+        '''
+        draw(surface) is called after everything else every frame
+        and returns the list of rects it drew
+        '''
+        self._overlays.append(draw)
+
+    def draw(self, deltatime, alpha=1, previous=None):
+        '''
+        alpha and previous are Updater.alpha and
+        Updater.previous_positions, for drawing between two fixed ticks
+        '''
+        timer = self.game.timer
+        t = timer.start()
         self.game.animator.update(deltatime)
-        self.bg.draw(self.display, deltatime)
+        timer.stop('animator', t)
 
-        for obj in self.game.world.get_all_objects():
-            obj.draw(self.display)
+        self.draw_frame(deltatime, alpha, previous)
 
-        self.game.gui.draw(self.display)
+    def draw_frame(self, deltatime, alpha=1, previous=None):
+        '''Draws everything, without advancing animations'''
+        timer = self.game.timer
+        t = timer.start()
+        if self.dirty_mode:
+            full = self._draw_background_layer(deltatime)
+        else:
+            self.bg.draw(self.display, deltatime)
+        timer.stop('background', t)
+
+        t = timer.start()
+        rects = self._draw_objects(alpha, previous)
+        timer.stop('objects', t)
+
+        t = timer.start()
+        gui_rects = self.game.gui.draw(self.display)
+        timer.stop('gui', t)
+
+        for draw in self._overlays:
+            gui_rects.extend(draw(self.display))
+
+        if self.dirty_mode:
+            rects.extend(gui_rects)
+            self._update_dirty(full, rects)
+
+    def _draw_objects(self, alpha, previous):
+        '''
+        Collects every object into one Surface.blits call,
+        returns the rects drawn when in dirty rect mode
+        '''
+        items = []
+        if previous and alpha < 1:
+            for obj in self.game.world.get_all_objects():
+                obj.draw_batch(items, previous.get(obj), alpha)
+        else:
+            alpha = 1
+            for obj in self.game.world.get_all_objects():
+                obj.draw_batch(items)
+        # Bullets used to be objects spawned after the enemies,
+        # they stay on top
+        if self.game.projectiles is not None:
+            self.game.projectiles.draw_projectiles(items, alpha)
+
+        if not self.dirty_mode:
+            self.display.blits(items, doreturn=False)
+            return None
+        return self.display.blits(items)
+
+    def _draw_background_layer(self, deltatime):
+        '''
+        Restores last frame's rects and the scrolled details
+        from the background layer,
+        returns True when the whole screen has to be updated
+        '''
+        screen_size = self.display.get_size()
+        full = False
+        if self._bg_layer is None or \
+           self._bg_layer.get_size() != screen_size:
+            self._bg_layer = pygame.surface.Surface(screen_size).convert()
+            self._bg_offset = None
+
+        self.bg.scroll(deltatime)
+        offset = self.bg.get_offset()
+        self._scrolled_rects = []
+        if offset != self._bg_offset:
+            self.bg.fill(self._bg_layer)
+            if self._bg_offset is None:
+                full = True
+            else:
+                scrolled = self.bg.scrolled_rects(
+                    screen_size, self._bg_offset, offset)
+                # Past the cap one blit of the layer is cheaper
+                if scrolled is None or len(scrolled) + \
+                   len(self._last_rects) > self.MAX_DIRTY_RECTS:
+                    full = True
+                else:
+                    self._scrolled_rects = scrolled
+            self._bg_offset = offset
+
+        if full:
+            self.display.blit(self._bg_layer, (0, 0))
+        else:
+            layer = self._bg_layer
+            self.display.blits(
+                [(layer, rect, rect) for rect in
+                 self._last_rects + self._scrolled_rects], doreturn=False)
+        return full
+
+    def _update_dirty(self, full, rects):
+        # Whatever is drawn now is restored on the next frame
+        if len(rects) + len(self._last_rects) + \
+           len(self._scrolled_rects) > self.MAX_DIRTY_RECTS:
+            self._last_rects = rects
+            self.game.dirty_rects = None
+            return
+
+        dirty = merge_rects(rects + self._last_rects)
+        self._last_rects = rects
+
+        screen = self.display.get_rect()
+        area = sum(r.clip(screen).width * r.clip(screen).height
+                   for r in dirty)
+        # Already clipped, they are not merged
+        dirty.extend(self._scrolled_rects)
+        area += sum(r.width * r.height for r in self._scrolled_rects)
+        if full or area > screen.width * screen.height * \
+           self.FULL_UPDATE_RATIO:
+            self.game.dirty_rects = None
+        else:
+            self.game.dirty_rects = dirty
 
 
 class GUI:
+    '''
+    Health, shield, score and the 'Loser' message,
+    composed into one layer that is rebuilt only when they change
+    '''
+    HEALTH_POS = (20, 20)
+    SHIELD_POS = (20, 60)
+    SCORE_POS = (20, 100)
+
     def __init__(self, player):
         self._health = gameobjects.ProgressBar()
         self._shield = gameobjects.ProgressBar((0, 0, 255), (0, 0, 0))
-        self._score = gameobjects.TextUI('0', (255, 0, 0), 32)
+        self._score = gameobjects.NumberUI('Score: ', (255, 0, 0), 32)
         self._big_message = gameobjects.TextUI('Loser', size=100)
         self._lost = False
         self._player = player
 
-    def draw(self, surface):
-        self._health.draw(surface, (20, 20))
-        self._shield.draw(surface, (20, 60))
-        self._score.draw(surface, (20, 100))
+        self._values = None
+        self._layer = None
+        self._layer_pos = (0, 0)
+        self._layer_state = None
+
+        # Layer rebuilds, in total and per second
+        self.rebuilds = 0
+        self.rebuild_rate = 0
+        self._rate_start = time.perf_counter()
+        self._rate_rebuilds = 0
+
+    def _items(self, screen_size):
+        items = [self._health.blit_item(self.HEALTH_POS),
+                 self._shield.blit_item(self.SHIELD_POS),
+                 self._score.blit_item(self.SCORE_POS)]
 
-        rect = surface.get_rect()
-        screen_center = (rect.width/2, rect.height/2)
-        screen_center = self._big_message.top_left_to_center(screen_center)
         if self._lost:
-            self._big_message.draw(surface, screen_center)
+            screen_center = (screen_size[0]/2, screen_size[1]/2)
+            screen_center = self._big_message.top_left_to_center(
+                screen_center)
+            items.append(self._big_message.blit_item(screen_center))
+        return items
+
+    def _rebuild(self, screen_size):
+        items = self._items(screen_size)
+        rects = [pygame.rect.Rect(pos, surf.get_size())
+                 for surf, pos in items]
+        bounds = rects[0].unionall(rects[1:])
+
+        if self._layer is None or self._layer.get_size() != bounds.size:
+            self._layer = pygame.surface.Surface(bounds.size,
+                                                 pygame.SRCALPHA, 32)
+        self._layer.fill((0, 0, 0, 0))
+        self._layer.blits([(surf, (rect.x - bounds.x, rect.y - bounds.y))
+                           for (surf, pos), rect in zip(items, rects)],
+                          doreturn=False)
+        self._layer_pos = bounds.topleft
+        self.rebuilds += 1
+
+    def draw(self, surface):
+        '''Returns the list of rects drawn'''
+        state = (self._values, self._lost, surface.get_size())
+        if state != self._layer_state:
+            self._rebuild(surface.get_size())
+            self._layer_state = state
+        return [surface.blit(self._layer, self._layer_pos)]
 
     def update(self):
-        self._health.set_value(self._player.health /
-                               self._player.HEALTH)
-        self._shield.set_value(self._player.get_shield_health() /
-                               gameobjects.shield_1.HEALTH)
-        self._score.set_test('Score: {}'.format(self._player.score))
+        values = (self._player.health / self._player.HEALTH,
+                  self._player.get_shield_health() /
+                  gameobjects.shield_1.HEALTH,
+                  self._player.score)
+        if values != self._values:
+            self._health.set_value(values[0])
+            self._shield.set_value(values[1])
+            self._score.set_value(values[2])
+            self._values = values
+
+        now = time.perf_counter()
+        if now - self._rate_start >= 1:
+            self.rebuild_rate = ((self.rebuilds - self._rate_rebuilds) /
+                                 (now - self._rate_start))
+            self._rate_start = now
+            self._rate_rebuilds = self.rebuilds
 
     def loser(self, lost=True):
         self._lost = lost
@@ -425,6 +1124,9 @@ class GUI:
 
 class Components():
     def __init__(self, game_state):
+        self.timer = FrameTimer()
+        # Set by Render in dirty rect mode, None updates the whole display
+        self.dirty_rects = None
         self.animator = Animator()
         gameobjects.WorldHelper.animator = self.animator
 
@@ -432,6 +1134,12 @@ class Components():
         self.player = gameobjects.Player()
         self.world.append(self.player)
 
+        self.projectiles = None
+        if ProjectileSystem.available():
+            self.projectiles = ProjectileSystem()
+            self.world.append(self.projectiles)
+        gameobjects.WorldHelper.projectiles = self.projectiles
+
         self.gui = GUI(self.player)
 
         self.spawner = EnemySpwaner(self.world, game_state)
@@ -449,6 +1157,9 @@ class Components():
         self.animator.clear()
         self.player.__init__()
         self.world.append(self.player)
+        if self.projectiles is not None:
+            self.projectiles.clear()
+            self.world.append(self.projectiles)
         self.collisions.__init__(self.world, self.game_state)
         self.gui.loser(False)
         self.spawner.__init__(self.world, self.game_state)
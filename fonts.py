@@ -0,0 +1,111 @@
+'''
+Shared fonts and a cache of rendered text surfaces
+'''
+import pygame
+from collections import OrderedDict
+
+
+class Fonts:
+    '''
+    Static registry of the loaded fonts keyed by (name, size),
+    name None is the pygame default font
+    '''
+    _fonts = {}
+
+    def get(size, name=None):
+        key = (name, size)
+        font = Fonts._fonts.get(key)
+        if font is None:
+            if not pygame.font.get_init():
+                pygame.font.init()
+            font = pygame.font.Font(name, size)
+            Fonts._fonts[key] = font
+        return font
+
+    def clear():
+        Fonts._fonts.clear()
+
+
+class TextCache:
+    '''
+    Least recently used cache of rendered text,
+    keyed by (font, text, color, antialias)
+    '''
+    CAPACITY = 256
+
+    def __init__(self, capacity=CAPACITY):
+        self.capacity = capacity
+        self._surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, font, text, color, antialias=False):
+        key = (font, text, tuple(color), antialias)
+        surf = self._surfaces.get(key)
+        if surf is not None:
+            self._surfaces.move_to_end(key)
+            self.hits += 1
+            return surf
+
+        self.misses += 1
+        surf = font.render(text, antialias, color)
+        self._surfaces[key] = surf
+        if len(self._surfaces) > self.capacity:
+            self._surfaces.popitem(last=False)
+        return surf
+
+    def __len__(self):
+        return len(self._surfaces)
+
+    def clear(self):
+        self._surfaces.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+# Shared by every text in the game
+text_cache = TextCache()
+
+
+class NumberText:
+    '''
+    A fixed prefix followed by a number,
+    composited from glyphs rendered once instead of rendering
+    the whole text again every time the number changes
+    '''
+    GLYPHS = '-0123456789'
+
+    def __init__(self, font, prefix, color, antialias=False):
+        self._font = font
+        self._prefix_text = prefix
+        self._prefix = text_cache.render(font, prefix, color, antialias)
+        self._glyphs = {c: text_cache.render(font, c, color, antialias)
+                        for c in self.GLYPHS}
+        self._height = max([self._prefix.get_height()] +
+                           [g.get_height() for g in self._glyphs.values()])
+        self._canvas = None
+        self._value = None
+        self.surface = None
+        self.set_value(0)
+
+    def set_value(self, value):
+        if value == self._value:
+            return
+        self._value = value
+
+        # Glyph advances are fractional, Font.size lays the text out
+        # without rendering it
+        text = self._prefix_text + str(int(value))
+        width = self._font.size(text)[0]
+        if self._canvas is None or self._canvas.get_width() < width:
+            # Room for a few more digits before growing again
+            self._canvas = pygame.surface.Surface(
+                (width + 4 * self._glyphs['0'].get_width(), self._height),
+                pygame.SRCALPHA, 32)
+
+        self._canvas.fill((0, 0, 0, 0))
+        self._canvas.blit(self._prefix, (0, 0))
+        for i in range(len(self._prefix_text), len(text)):
+            x = self._font.size(text[:i])[0]
+            self._canvas.blit(self._glyphs[text[i]], (x, 0))
+        self.surface = self._canvas.subsurface((0, 0, width, self._height))
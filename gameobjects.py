@@ -1,15 +1,63 @@
 import pygame
 from pygame.math import Vector2
 import random
+import bisect
+from concurrent.futures import ThreadPoolExecutor
+import spritecache
+from fonts import Fonts, NumberText, text_cache
+from paths import PathBatch, ArcLengthTable
 
 
 class ResourcesLoader():
+    LIST_PATH = 'sprites/sprites_list.csv'
+    CACHE_PATH = 'sprites/sprites.cache'
+    USE_CACHE = True
+    # Without a valid cache:
+    # PARALLEL decodes the pngs on a thread pool,
+    # only converting them on the main thread.
+    # LAZY decodes each sprite the first time it is looked up,
+    # see prefetch. There is no atlas in lazy mode
+    PARALLEL = False
+    LAZY = False
+    WORKERS = 4
+
+    executor = None
+    atlas = None
+
     def __init__():
-        file = open('sprites/sprites_list.csv')
+        entries = None
+        if ResourcesLoader.USE_CACHE:
+            entries = spritecache.load(ResourcesLoader.CACHE_PATH,
+                                       ResourcesLoader.LIST_PATH)
+
+        if entries is not None:
+            ResourcesLoader.sprites = {}
+            for name, path, tx, ty, fps, frames in entries:
+                ResourcesLoader.sprites[name] = ResourcesLoader.build(
+                    name, tx, ty, fps, frames[0], frames)
+        elif ResourcesLoader.LAZY:
+            ResourcesLoader.sprites = LazySprites(
+                ResourcesLoader.read_list(ResourcesLoader.LIST_PATH))
+            ResourcesLoader.atlas = None
+            return
+        else:
+            ResourcesLoader.sprites = ResourcesLoader.decode_all()
+            if ResourcesLoader.USE_CACHE:
+                spritecache.write(ResourcesLoader.CACHE_PATH,
+                                  ResourcesLoader.LIST_PATH,
+                                  ResourcesLoader.cache_entries())
+
+        ResourcesLoader.atlas = Atlas()
+        ResourcesLoader.atlas.pack(
+            [sprite for sprite in ResourcesLoader.sprites.values()
+             if not isinstance(sprite, Background)])
+
+    def read_list(path):
+        '''Returns list of (name, path, tiles_x, tiles_y, fps)'''
+        file = open(path)
         file.readline()
 
-        ResourcesLoader.sprites = {}
-
+        entries = []
         while True:
             line = file.readline()
             if line == '':
@@ -19,24 +67,109 @@ class ResourcesLoader():
             data = line.split(',')
 
             name, path, tx, ty, fps = data
-            tx = int(tx)
-            ty = int(ty)
-            fps = int(fps)
+            entries.append((name, path, int(tx), int(ty), int(fps)))
+
+        file.close()
+        return entries
+
+    def get_executor():
+        if ResourcesLoader.executor is None:
+            ResourcesLoader.executor = ThreadPoolExecutor(
+                max_workers=ResourcesLoader.WORKERS)
+        return ResourcesLoader.executor
+
+    def decode_all():
+        '''Decodes every png from the sprite list, returns name: Sprite'''
+        entries = ResourcesLoader.read_list(ResourcesLoader.LIST_PATH)
+        paths = [entry[1] for entry in entries]
+        if ResourcesLoader.PARALLEL:
+            images = ResourcesLoader.get_executor().map(pygame.image.load,
+                                                        paths)
+        else:
+            images = map(pygame.image.load, paths)
+
+        sprites = {}
+        for (name, path, tx, ty, fps), img in zip(entries, images):
+            sprites[name] = ResourcesLoader.build(name, tx, ty, fps, img)
+        return sprites
+
+    def build(name, tx, ty, fps, img, frames=None):
+        '''
+        Sprite from a decoded image, must run on the main thread.
+        frames: the image already sliced and converted
+        '''
+        if name == 'background':
+            # The starfield is opaque
+            return Background(img.convert())
+
+        if frames is None:
+            img = img.convert_alpha()
+        sprite = Sprite(img, tx, ty, frames)
+        # 0 keeps the default
+        if fps > 0:
+            sprite.fps = fps
+        return sprite
 
-            if name == 'background':
-                sprite = ResourcesLoader.background(path)
+    def cache_entries():
+        '''Loaded sprites in the format of spritecache.write'''
+        entries = []
+        for name, path, tx, ty, fps in \
+                ResourcesLoader.read_list(ResourcesLoader.LIST_PATH):
+            sprite = ResourcesLoader.sprites[name]
+            if isinstance(sprite, Background):
+                frames = [sprite.image]
             else:
-                sprite = ResourcesLoader.sprite_from_path(path, tx, ty)
+                frames = sprite._imgs
+            entries.append((name, path, tx, ty, fps, frames))
+        return entries
+
+    def prefetch(names):
+        '''
+        Hint that the named sprites are needed soon,
+        starts decoding them in the background in lazy mode
+        '''
+        if isinstance(ResourcesLoader.sprites, LazySprites):
+            ResourcesLoader.sprites.prefetch(names)
+
+
+class LazySprites(dict):
+    '''
+    Name: Sprite dictionary of ResourcesLoader.LAZY,
+    entries are decoded the first time they are looked up
+    '''
+    def __init__(self, entries):
+        super(LazySprites, self).__init__()
+        # Key: name
+        # Value: (name, path, tiles_x, tiles_y, fps)
+        self._pending = {entry[0]: entry for entry in entries}
+        # Key: name
+        # Value: Future of the decoded image
+        self._decoding = {}
+
+    def __missing__(self, name):
+        name, path, tx, ty, fps = self._pending.pop(name)
+        future = self._decoding.pop(name, None)
+        if future is None:
+            img = pygame.image.load(path)
+        else:
+            img = future.result()
+
+        sprite = ResourcesLoader.build(name, tx, ty, fps, img)
+        self[name] = sprite
+        return sprite
 
-            ResourcesLoader.sprites[name] = sprite
+    def __contains__(self, name):
+        return dict.__contains__(self, name) or name in self._pending
 
-    def sprite_from_path(filename, tx, ty):
-        img = pygame.image.load(filename).convert_alpha()
-        return Sprite(img, tx, ty)
+    def prefetch(self, names):
+        for name in names:
+            if name in self._pending and name not in self._decoding:
+                self._decoding[name] = ResourcesLoader.get_executor().submit(
+                    pygame.image.load, self._pending[name][1])
 
-    def background(path):
-        img = pygame.image.load(path).convert_alpha()
-        return Background(img)
+    def pending(self):
+        '''Names not decoded yet'''
+        return list(self._pending)
 
 
 class WorldHelper:
@@ -47,8 +180,68 @@ class WorldHelper:
     '''
     append = None
     remove = None
+    flush = None
     animator = None
     screen_rect = None
+    projectiles = None
+    pool = None
+
+
+class ObjectPool:
+    '''
+    Keeps removed objects of pooled types (POOL_CAPACITY > 0)
+    so they can be reused instead of constructed again
+    '''
+    def __init__(self):
+        # Key: Object class
+        # Value: list of free objects
+        self._free = {}
+        # Key: Object class name
+        self.hits = {}
+        self.misses = {}
+
+    def _count(self, dic, type):
+        name = type.__name__
+        dic[name] = dic.get(name, 0) + 1
+
+    def acquire(self, type):
+        '''Returns a free object of the type or None'''
+        free = self._free.get(type)
+        if not free:
+            self._count(self.misses, type)
+            return None
+
+        self._count(self.hits, type)
+        obj = free.pop()
+        obj._in_pool = False
+        obj.on_acquire()
+        return obj
+
+    def release(self, obj):
+        type = obj.__class__
+        if obj._in_pool or type.POOL_CAPACITY <= 0:
+            return
+        if type not in self._free:
+            self._free[type] = []
+
+        free = self._free[type]
+        if len(free) < type.POOL_CAPACITY:
+            obj.on_release()
+            obj._in_pool = True
+            free.append(obj)
+
+    def take(self, obj):
+        '''Takes out an object that was appended without acquire'''
+        if obj._in_pool:
+            self._free[obj.__class__].remove(obj)
+            obj._in_pool = False
+            obj.on_acquire()
+
+    def free_count(self, type):
+        return len(self._free.get(type, ()))
+
+    def clear(self):
+        self._free.clear()
 
 
 def Rect_From_Center(pos, size):
@@ -57,18 +250,92 @@ def Rect_From_Center(pos, size):
         return pygame.rect.Rect(tx1, ty1, size[0], size[1])
 
 
+# Reused by the checks that do not keep the rect of an object
+_check_rect = pygame.rect.Rect(0, 0, 0, 0)
+
+
 def velocity_dir(start, end, velocity):
     dir = (end - start).normalize()
     return dir * velocity
 
 
+def spawn_bullet(type, pos, speed=None):
+    '''
+    Fires a bullet of the given Bullet class,
+    goes through WorldHelper.projectiles when there is one
+    '''
+    if WorldHelper.projectiles is not None:
+        WorldHelper.projectiles.spawn(type, pos, speed)
+        return
+
+    bullet = type.acquire()
+    bullet.set_pos(pos)
+    if speed is not None:
+        bullet.speed.update(speed)
+    WorldHelper.append(bullet)
+
+
+class Atlas:
+    '''
+    Packs the frames of many sprites into one surface,
+    row by row (shelf packing), tallest frames first
+    '''
+    WIDTH = 1024
+    PADDING = 1
+
+    def __init__(self, width=WIDTH):
+        self.width = width
+        self.surface = None
+
+    def pack(self, sprites):
+        frames = []
+        for sprite in sprites:
+            for i, img in enumerate(sprite._imgs):
+                frames.append((sprite, i, img))
+        frames.sort(key=lambda f: f[2].get_height(), reverse=True)
+
+        # Place frames
+        areas = []
+        x, y, shelf_height = 0, 0, 0
+        for sprite, i, img in frames:
+            w, h = img.get_size()
+            if x + w > self.width:
+                x = 0
+                y += shelf_height + self.PADDING
+                shelf_height = 0
+            areas.append(pygame.rect.Rect(x, y, w, h))
+            x += w + self.PADDING
+            shelf_height = max(shelf_height, h)
+
+        self.surface = pygame.surface.Surface(
+            (self.width, y + shelf_height), pygame.SRCALPHA, 32)
+        if pygame.display.get_surface() is not None:
+            self.surface = self.surface.convert_alpha()
+        self.surface.fill((0, 0, 0, 0))
+
+        for (sprite, i, img), area in zip(frames, areas):
+            self.surface.blit(img, area)
+            sprite.set_atlas_area(self.surface, i, area)
+
+
 class Sprite(pygame.sprite.Sprite):
-    def __init__(self, img, tiles_x, tiles_y=1):
+    def __init__(self, img, tiles_x, tiles_y=1, frames=None):
+        '''frames: the sheet already divided, img is not sliced then'''
         super(Sprite, self).__init__()
         self.frames_count = tiles_x * tiles_y
         self.fps = 30
-        self._sub_images(img, tiles_x, tiles_y)
+        if frames is None:
+            self._sub_images(img, tiles_x, tiles_y)
+        else:
+            self._imgs = list(frames)
         self.image = self._imgs[0]
+        # Set when packed into an Atlas
+        self.atlas = None
+        self._areas = [None] * self.frames_count
+
+    def set_atlas_area(self, atlas, frame, area):
+        self.atlas = atlas
+        self._areas[frame] = area
 
     def _sub_images(self, img, tiles_x, tiles_y):
         # non animated check:
@@ -98,26 +365,133 @@ class Sprite(pygame.sprite.Sprite):
                 self._imgs.append(sub_surface)
 
     def draw(self, target_surface, pos, frame):
+        '''Returns the rect drawn'''
         img = self._imgs[frame]
         rect = Rect_From_Center(pos, img.get_size())
-        target_surface.blit(img, rect)
+        return target_surface.blit(img, rect)
+
+    def blit_item(self, pos, frame):
+        '''Returns (surface, dest, area) for Surface.blits'''
+        img = self._imgs[frame]
+        w, h = img.get_size()
+        dest = (pos[0] - w/2, pos[1] - h/2)
+        if self.atlas is None:
+            return (img, dest, None)
+        return (self.atlas, dest, self._areas[frame])
 
 
 class Background(Sprite):
+    # Draw from a pre-composited strip instead of tiling every frame,
+    # None picks the strip when tiling takes more than MAX_TILE_BLITS.
+    # A full screen blit is memory bound, a few blits of a small
+    # tile that stays in cache are cheaper
+    CACHED = None
+    MAX_TILE_BLITS = 32
+    # Scrolling only changes the pixels of the tile that differ
+    # from its base color, when they are at most this fraction of it
+    MAX_DETAIL_RATIO = 0.25
+
     def __init__(self, img):
         self.image = img
         self._size = img.get_rect()
         self.scroll_speed = 100
         self._y = 0
+        self.cached = self.CACHED
+        self._strip = None
+        self._details = False  # Computed on first use, may be None
 
     def draw(self, display, delta_time):
+        self.fill(display)
+        self.scroll(delta_time)
+
+    def scroll(self, delta_time):
+        self._y += delta_time * self.scroll_speed
+        self._y %= self._size.height
+
+    def get_offset(self):
+        '''Scroll offset in whole pixels'''
+        return int(self._y)
+
+    def detail_rects(self):
+        '''
+        Rects of the tile around the pixels that differ from its
+        base color (the top left pixel), None when there are too many
+        '''
+        if self._details is False:
+            mask = pygame.mask.from_threshold(
+                self.image, self.image.get_at((0, 0)), (1, 1, 1, 255))
+            mask.invert()
+            self._details = None
+            if mask.count() <= self.MAX_DETAIL_RATIO * \
+               self._size.width * self._size.height:
+                self._details = mask.get_bounding_rects()
+        return self._details
+
+    def scrolled_rects(self, screen_size, old_offset, new_offset):
+        '''
+        Screen rects that change when the offset goes from
+        old_offset to new_offset, None when the whole screen may
+        '''
+        details = self.detail_rects()
+        if details is None:
+            return None
+
+        tile_width, tile_height = self._size.size
+        moved = (new_offset - old_offset) % tile_height
+        screen = pygame.rect.Rect((0, 0), screen_size)
+        rects = []
+        # Every tile row at the old offset, each detail grows down
+        # to cover where it is at the new offset too
+        y = old_offset % tile_height - 2 * tile_height
+        while y < screen.height:
+            for x in range(0, screen.width, tile_width):
+                for r in details:
+                    rect = screen.clip(r.x + x, r.y + y, r.w, r.h + moved)
+                    if rect.height > 0 and rect.width > 0:
+                        rects.append(rect)
+            y += tile_height
+        return rects
+
+    def _build_strip(self, screen_size):
+        '''
+        Opaque strip of tiles as wide as the screen
+        and one tile taller, any scroll offset is a window into it
+        '''
+        width, height = screen_size
+        self._strip = pygame.surface.Surface(
+            (width, height + self._size.height)).convert()
+        self._fill_tiles(self._strip, 0)
+
+    def _use_strip(self, screen_size):
+        if self.cached is not None:
+            return self.cached
+        columns = -(-screen_size[0] // self._size.width)
+        rows = -(-screen_size[1] // self._size.height) + 1
+        return columns * rows > self.MAX_TILE_BLITS
+
+    def fill(self, display):
+        screen_size = display.get_size()
+        if not self._use_strip(screen_size):
+            self._fill_tiles(display,
+                             self.get_offset() - self._size.height)
+            return
+
+        if self._strip is None or \
+           self._strip.get_size()[0] != screen_size[0] or \
+           self._strip.get_size()[1] != screen_size[1] + self._size.height:
+            self._build_strip(screen_size)
+
+        tile_height = self._size.height
+        top = (tile_height - int(self._y)) % tile_height
+        display.blit(self._strip, (0, 0),
+                     (0, top, screen_size[0], screen_size[1]))
+
+    def _fill_tiles(self, display, y):
         # Fill size with background.
         # Always rendering more than one additional tile
         screen_rect = display.get_rect()
 
-        x, y = 0, self._y - self._size.height
-        self._y += delta_time * self.scroll_speed
-        self._y %= self._size.height
+        x = 0
 
         while y < screen_rect.height:
             while x < screen_rect.width:
@@ -131,42 +505,120 @@ class Background(Sprite):
 class GameObject:
     OBJECT_TYPE = ''
     COLLISION_SCALE = 0.75
+    # Max free objects kept by the ObjectPool, 0 is not pooled
+    POOL_CAPACITY = 0
+    # Drawn between its last two fixed tick positions,
+    # off for objects moved by input between the ticks
+    INTERPOLATE = True
+    # Parents that count the moves of their anchor set it to an int,
+    # Attachable children then skip comparing positions
+    _anchor_version = None
+    __slots__ = ('_pos', '_size', 'speed', 'on_removed_event', '_in_pool')
 
     def __init__(self):
         self._pos = Vector2(0, 0)
         self._size = Vector2(1, 1)
         self.speed = Vector2(0, 0)
         self.on_removed_event = []
+        self._in_pool = False
+
+    @classmethod
+    def acquire(cls):
+        '''
+        Returns a reset object from the pool,
+        or a new one when the pool is empty
+        '''
+        obj = None
+        if cls.POOL_CAPACITY > 0 and WorldHelper.pool is not None:
+            obj = WorldHelper.pool.acquire(cls)
+        if obj is None:
+            obj = cls()
+        return obj
+
+    def on_acquire(self):
+        '''Called when taken out of the pool, resets the state'''
+        self._pos.update(0, 0)
+        self.speed.update(0, 0)
+
+    def on_release(self):
+        '''Called when put back into the pool'''
+        self.on_removed_event.clear()
 
     def update(self, delta_time):
         # Movement
-        self._pos += self.speed * delta_time
+        speed = self.speed
+        if speed.x or speed.y:
+            self.integrate_ip(speed, delta_time)
 
     def draw(self, display):
         pass
 
+    def draw_batch(self, items, previous=None, alpha=1):
+        '''
+        Appends (surface, dest, area) tuples to items instead of drawing,
+        at alpha between the previous position (alpha 0) and current one
+        '''
+        pass
+
     def get_rect(self):
         return Rect_From_Center(self._pos, (self._size[0] * self.COLLISION_SCALE,
                                             self._size[1] * self.COLLISION_SCALE))
 
+    def collision_box(self):
+        '''Returns (center_x, center_y, width, height) of get_rect'''
+        return (self._pos[0], self._pos[1],
+                self._size[0] * self.COLLISION_SCALE,
+                self._size[1] * self.COLLISION_SCALE)
+
     def collides(self, other):
         return self.get_rect().colliderect(other.get_rect())
 
+    def get_rect_ip(self, rect):
+        '''Sets rect to get_rect() in place, returns rect'''
+        pos = self._pos
+        width = self._size[0] * self.COLLISION_SCALE
+        height = self._size[1] * self.COLLISION_SCALE
+        rect.update(pos.x - width / 2, pos.y - height / 2, width, height)
+        return rect
+
     def inside_screen(self, screen_rect):
-        self_rect = self.get_rect()
+        self_rect = self.get_rect_ip(_check_rect)
         return self_rect.colliderect(screen_rect)
 
     def get_pos(self):
         return Vector2(self._pos)  # a copy
 
     def set_pos(self, pos):
-        self._pos = Vector2(pos)  # a copy
+        self._pos.update(pos)  # copies the values, not the Vector2
+
+    def pos_view(self):
+        '''
+        The position itself, not a copy, for reading without allocating.
+        Do not modify or keep it, it changes when the object moves
+        '''
+        return self._pos
+
+    def translate_ip(self, x, y):
+        '''Moves by (x, y) in place'''
+        pos = self._pos
+        pos.x += x
+        pos.y += y
+
+    def integrate_ip(self, velocity, delta_time):
+        '''Moves by velocity * delta_time in place'''
+        pos = self._pos
+        pos.x += velocity.x * delta_time
+        pos.y += velocity.y * delta_time
 
     def move(self, offset):
-        self.set_pos(self._pos + offset)
+        self.translate_ip(offset[0], offset[1])
+
+    def anchor(self):
+        '''Position Attachable children are relative to'''
+        return self._pos
 
     def remove_outside_screen(self):
-        if not self.get_rect().colliderect(WorldHelper.screen_rect):
+        if not self.inside_screen(WorldHelper.screen_rect):
             WorldHelper.remove(self)
 
     def on_world_remove(self):
@@ -175,30 +627,208 @@ class GameObject:
             event(self)
 
 
+class Attachable:
+    '''
+    Mixin for objects that can follow a parent object.
+    While attached the position is an offset from parent.anchor(),
+    the world position is computed when read and cached until
+    the anchor moves, so moving the parent does not touch its children.
+    get_pos/set_pos keep working in world coordinates.
+
+    Declares no slots itself, the classes using it add SLOTS to theirs
+    (two bases with slots can not be combined)
+    '''
+    # _seen_anchor and _seen_version are the anchor (or its version)
+    # _world was computed from
+    SLOTS = ('_parent', '_world', '_local', '_seen_anchor', '_seen_version')
+    __slots__ = ()
+
+    def __init__(self, *args, **kw):
+        self._parent = None
+        self._world = None
+        self._local = None
+        self._seen_anchor = None
+        self._seen_version = None
+        super(Attachable, self).__init__(*args, **kw)
+
+    def attach(self, parent, offset=None):
+        '''offset from the anchor of parent, None keeps the position'''
+        if offset is None:
+            offset = self._pos - parent.anchor()
+        self._parent = parent
+        self._local = Vector2(offset)
+        self._seen_anchor = None
+        self._seen_version = None
+
+    def detach(self):
+        if self._parent is not None:
+            world = self._pos
+            self._parent = None
+            self._world = world
+
+    def get_parent(self):
+        return self._parent
+
+    def update(self, delta_time):
+        if self._parent is None:
+            super(Attachable, self).update(delta_time)
+        elif self.speed.x or self.speed.y:
+            self.integrate_ip(self.speed, delta_time)
+
+    def set_pos(self, pos):
+        if self._parent is None:
+            self._world.update(pos)
+        else:
+            self._pos = pos
+
+    def translate_ip(self, x, y):
+        if self._parent is None:
+            super(Attachable, self).translate_ip(x, y)
+            return
+        # The offset moves and the world position with it,
+        # a stale world position gets computed again anyway
+        world = self._pos
+        self._local.x += x
+        self._local.y += y
+        world.x += x
+        world.y += y
+
+    def integrate_ip(self, velocity, delta_time):
+        self.translate_ip(velocity.x * delta_time, velocity.y * delta_time)
+
+    @property
+    def _pos(self):
+        parent = self._parent
+        if parent is None:
+            return self._world
+
+        version = parent._anchor_version
+        if version is not None:
+            if version != self._seen_version:
+                self._seen_version = version
+                self._follow(parent.anchor())
+            return self._world
+
+        anchor = parent.anchor()
+        if anchor != self._seen_anchor:
+            self._see(anchor)
+            self._follow(anchor)
+        return self._world
+
+    @_pos.setter
+    def _pos(self, pos):
+        parent = self._parent
+        if parent is None:
+            self._world = pos
+            return
+        anchor = parent.anchor()
+        self._local.update(pos)
+        self._local -= anchor
+        self._see(anchor)
+        self._seen_version = parent._anchor_version
+        if self._world is None:
+            self._world = Vector2(pos)
+        else:
+            self._world.update(pos)
+
+    # The cached vectors are updated in place, not replaced
+
+    def _see(self, anchor):
+        if self._seen_anchor is None:
+            self._seen_anchor = Vector2(anchor)
+        else:
+            self._seen_anchor.update(anchor)
+
+    def _follow(self, anchor):
+        world = self._world
+        if world is None:
+            self._world = anchor + self._local
+        else:
+            world.update(anchor)
+            world += self._local
+
+
 class SpriteGameObject(GameObject):
     '''
     Implementation with sprite
     which gets the size from it
     '''
     SPRITE_NAME = ''
+    # Animation speed, None uses the fps of the sprite
+    ANIMATION_FPS = None
+    __slots__ = ('sprite', '_frame', '_animator', 'animation_start',
+                 'animation_fps', '_animation_loop')
 
     def __init__(self):
         GameObject.__init__(self)
         sprite = self._load_sprite()
         self.sprite = sprite
         self._size = sprite.image.get_size()
-        self.frame = 0
+        self._frame = 0
+        # Set while animated by an Animator
+        self._animator = None
+        self.animation_start = 0
+        self.animation_fps = 0
+        self._animation_loop = False
 
     def _load_sprite(self):
         sprite = ResourcesLoader.sprites[self.SPRITE_NAME]
         return sprite
 
+    def on_acquire(self):
+        super(SpriteGameObject, self).on_acquire()
+        self.frame = 0
+
+    @property
+    def frame(self):
+        animator = self._animator
+        if animator is None:
+            return self._frame
+
+        frame = int((animator.time - self.animation_start) *
+                    self.animation_fps)
+        if self._animation_loop:
+            return frame % self.sprite.frames_count
+        return min(frame, self.sprite.frames_count - 1)
+
+    @frame.setter
+    def frame(self, frame):
+        self._frame = frame
+        if self._animator is not None:
+            self.animation_start = (self._animator.time -
+                                    frame / self.animation_fps)
+
+    def start_animation(self, animator, fps=None, loop=True):
+        '''Called by Animator, animates from the first frame'''
+        if fps is None:
+            fps = self.ANIMATION_FPS or self.sprite.fps
+        self._animator = animator
+        self.animation_start = animator.time
+        self.animation_fps = fps
+        self._animation_loop = loop
+
+    def stop_animation(self):
+        '''Called by Animator, keeps the current frame'''
+        self._frame = self.frame
+        self._animator = None
+
+    def animation_end(self):
+        return (self.animation_start +
+                self.sprite.frames_count / self.animation_fps)
+
     def draw(self, target_surf):
-        self.sprite.draw(target_surf, self._pos, self.frame)
+        return self.sprite.draw(target_surf, self._pos, self.frame)
+
+    def draw_batch(self, items, previous=None, alpha=1):
+        pos = self._pos
+        if previous is not None:
+            pos = previous.lerp(pos, alpha)
+        items.append(self.sprite.blit_item(pos, self.frame))
 
 
 class HealthGameObject(SpriteGameObject):
     HEALTH = 0
+    __slots__ = ('health',)
 
     def __init__(self, *args, **kw):
         super(HealthGameObject, self).__init__(*args, **kw)
@@ -216,8 +846,12 @@ class HealthGameObject(SpriteGameObject):
 
 class Player(HealthGameObject):
     SPRITE_NAME = 'player'
+    ANIMATION_FPS = 15
     OBJECT_TYPE = 'player'
     HEALTH = 100
+    # Follows the mouse every frame
+    INTERPOLATE = False
+    __slots__ = ('_shooting_modes', '_shooting_mode', '_shield', 'score')
 
     def __init__(self, *args, **kw):
         super(Player, self).__init__(*args, **kw)
@@ -229,7 +863,6 @@ class Player(HealthGameObject):
         self._shield = None
         self.score = 0
 
-        self.sprite.fps = 15
         WorldHelper.animator.add_object_loop(self)
 
     def take_damage(self, damage):
@@ -259,9 +892,8 @@ class Player(HealthGameObject):
         self._shooting_modes[self._shooting_mode]()
 
     def _create_bullet(self, offset_x, offset_y, type):
-        b = type()
-        b.set_pos(self._pos + Vector2(offset_x, offset_y))
-        WorldHelper.append(b)
+        spawn_bullet(type, (self._pos[0] + offset_x,
+                            self._pos[1] + offset_y))
 
     def upgrade_shoot(self):
         if self._shooting_mode < len(self._shooting_modes) - 1:
@@ -303,11 +935,17 @@ class Bullet(SpriteGameObject):
     OBJECT_TYPE = 'bullet'
     DAMAGE = 25
     SPEED = -1000
+    POOL_CAPACITY = 256
+    __slots__ = ()
 
     def __init__(self):
         super(Bullet, self).__init__()
         self.speed.y = self.SPEED
 
+    def on_acquire(self):
+        super(Bullet, self).on_acquire()
+        self.speed.y = self.SPEED
+
     def update(self, dt):
         super(Bullet, self).update(dt)
         self.remove_outside_screen()
@@ -317,6 +955,7 @@ class Bullet2(Bullet):
     SPRITE_NAME = 'bullet_2'
     OBJECT_TYPE = 'bullet'
     DAMAGE = 50
+    __slots__ = ()
 
 
 class EBullet(Bullet):
@@ -324,34 +963,39 @@ class EBullet(Bullet):
     OBJECT_TYPE = 'enemy_bullet'
     DAMAGE = 25
     SPEED = 300
+    __slots__ = ()
 
 
 class EBulletTargeted(EBullet):
-    def __init__(self, pos, target):
+    __slots__ = ()
+
+    def __init__(self, pos=(0, 0), target=None):
         super(EBulletTargeted, self).__init__()
         self.set_pos(pos)
-        self.speed = velocity_dir(pos,
-                                  target,
-                                  self.SPEED)
+        if target is not None:
+            self.speed = velocity_dir(Vector2(pos),
+                                      target,
+                                      self.SPEED)
 
 
-class Enemy(HealthGameObject):
+class Enemy(Attachable, HealthGameObject):
     SPRITE_NAME = 'enemy'
     OBJECT_TYPE = 'enemy'
     ENEMY_TYPE = 'simple'
     HEALTH = 75
     SCORE = 100
+    BULLET = EBullet
+    __slots__ = Attachable.SLOTS
 
     def shoot(self):
-        bullet = EBullet()
-        bullet.set_pos(self._pos)
-        WorldHelper.append(bullet)
+        spawn_bullet(self.BULLET, self._pos)
 
 
 class Enemy2(Enemy):
     SPRITE_NAME = 'enemy_blue2'
     HEALTH = 125
     SCORE = 300
+    __slots__ = ()
 
 
 class EnemyDiver(Enemy):
@@ -360,6 +1004,7 @@ class EnemyDiver(Enemy):
     ENEMY_TYPE = 'diver'
     HEALTH = 100
     SCORE = 200
+    __slots__ = ()
 
     def dive(self):
         move = MovementAccelDown(self.ACCEL_TIME, self.DIVE_SPEED)
@@ -372,25 +1017,33 @@ class EnemyTargtedBullet(Enemy):
     HEALTH = 150
     SCORE = 500
     ENEMY_TYPE = 'targeted_bullet'
+    BULLET = EBulletTargeted
+    __slots__ = ('player',)
 
     def __init__(self, player):
         super(EnemyTargtedBullet, self).__init__()
         self.player = player
 
     def shoot(self):
-        bullet = EBulletTargeted(self.get_pos(),
-                                 self.player.get_pos())
-
-        WorldHelper.append(bullet)
+        pos = self.pos_view()
+        spawn_bullet(self.BULLET, pos,
+                     velocity_dir(pos, self.player.pos_view(),
+                                  self.BULLET.SPEED))
 
 
 class Explosion(SpriteGameObject):
     SPRITE_NAME = 'explosion'
     OBJECT_TYPE = 'explosion'
+    POOL_CAPACITY = 64
+    ANIMATION_FPS = 15
+    __slots__ = ()
 
     def __init__(self):
         super(Explosion, self).__init__()
-        self.sprite.fps = 15
+        WorldHelper.animator.add_object_onetime(self, self.on_finish)
+
+    def on_acquire(self):
+        super(Explosion, self).on_acquire()
         WorldHelper.animator.add_object_onetime(self, self.on_finish)
 
     def on_finish(self):
@@ -400,11 +1053,17 @@ class Explosion(SpriteGameObject):
 class DropItem(SpriteGameObject):
     OBJECT_TYPE = 'dropitem'
     SPEED = 150
+    POOL_CAPACITY = 16
+    __slots__ = ()
 
     def __init__(self, *args, **kwargs):
         super(DropItem, self).__init__(*args, **kwargs)
         self.speed = Vector2(0, self.SPEED)
 
+    def on_acquire(self):
+        super(DropItem, self).on_acquire()
+        self.speed.y = self.SPEED
+
     def update(self, dt):
         super(DropItem, self).update(dt)
         self.remove_outside_screen()
@@ -413,51 +1072,80 @@ class DropItem(SpriteGameObject):
 class PowerupWeapon(DropItem):
     SPRITE_NAME = 'pu_weapon'
     PU_TYPE = 'weapon'
+    __slots__ = ()
 
 
 class PowerupShield(DropItem):
     SPRITE_NAME = 'pu_shield'
     PU_TYPE = 'shield'
+    __slots__ = ()
 
 
 class PowerupHealth(DropItem):
     SPRITE_NAME = 'pu_health'
     PU_TYPE = 'health'
+    __slots__ = ()
 
 
-class Shield(HealthGameObject):
+class Shield(Attachable, HealthGameObject):
     OBJECT_TYPE = 'shield'
     HEALTH = 0
     OFF_Y = 0
+    # Attached to the player
+    INTERPOLATE = False
+    __slots__ = Attachable.SLOTS + ('_player',)
 
     def set_player(self, player):
         self._player = player
+        self.attach(player, (0, self.OFF_Y))
 
     def update(self, delta_time):
-        self._pos = self._player.get_pos()
-        self._pos.y += self.OFF_Y
+        # Follows the player through attach
+        pass
 
 
 class shield_1(Shield):
     SPRITE_NAME = 'shield_1'
     HEALTH = 100
     OFF_Y = -30
+    __slots__ = ()
 
 
 class EnemyGroup(GameObject):
     OBJECT_TYPE = 'enemy_group'
 
+    # Removed enemies closer than this to an edge shrink the bounds.
+    # Enemy rects are truncated to ints while the cached bounds move
+    # by fractions, the two differ by less than a pixel
+    EDGE_EPSILON = 1
+    __slots__ = ('enemies', 'all_enemies', '_anchor', '_anchor_version',
+                 '_bounds')
+
     def __init__(self):
         super(EnemyGroup, self).__init__()
         self.enemies = {}
         self.all_enemies = []
+        # Enemies are attached relative to this,
+        # moving the group only moves it
+        self._anchor = Vector2(0, 0)
+        self._anchor_version = 0
+        # (left, top, right, bottom) of the enemy rects,
+        # None when it has to be computed again
+        self._bounds = None
 
     def append(self, enemy):
         if enemy.ENEMY_TYPE in self.enemies:
             self.enemies[enemy.ENEMY_TYPE].append(enemy)
             self.all_enemies.append(enemy)
             enemy.on_removed_event.append(self.on_child_removed)
+            enemy.attach(self)
             WorldHelper.append(enemy)
+            if self._bounds is not None:
+                left, top, right, bottom = self._bounds
+                rect = enemy.get_rect()
+                self._bounds = (min(left, rect.left), min(top, rect.top),
+                                max(right, rect.right),
+                                max(bottom, rect.bottom))
         else:
             self.enemies[enemy.ENEMY_TYPE] = []
             self.append(enemy)
@@ -485,26 +1173,64 @@ class EnemyGroup(GameObject):
     def on_child_removed(self, child):
         self.enemies[child.ENEMY_TYPE].remove(child)
         self.all_enemies.remove(child)
+        child.detach()
         if len(self.all_enemies) == 0:
             WorldHelper.remove(self)
 
+        # Only an enemy on an edge can shrink the bounds
+        if self._bounds is not None:
+            left, top, right, bottom = self._bounds
+            rect = child.get_rect()
+            eps = self.EDGE_EPSILON
+            if rect.left <= left + eps or rect.top <= top + eps or \
+               rect.right >= right - eps or rect.bottom >= bottom - eps:
+                self._bounds = None
+
     def update(self, delta_time):
         pass
 
-    def _update_pos(self, diff):
-        for e in self.all_enemies:
-            e.move(diff)
+    def translate_ip(self, x, y):
+        super(EnemyGroup, self).translate_ip(x, y)
+        self._update_pos(x, y)
+
+    def _update_pos(self, x, y):
+        anchor = self._anchor
+        anchor.x += x
+        anchor.y += y
+        self._anchor_version += 1
+        if self._bounds is not None:
+            left, top, right, bottom = self._bounds
+            self._bounds = (left + x, top + y, right + x, bottom + y)
+
+    def anchor(self):
+        return self._anchor
+
+    def invalidate_bounds(self):
+        '''Call after moving enemies one by one'''
+        self._bounds = None
+
+    def get_bounds(self):
+        '''(left, top, right, bottom) of all the enemies'''
+        if self._bounds is None:
+            if len(self.all_enemies) == 0:
+                return (self._pos[0], self._pos[1],
+                        self._pos[0], self._pos[1])
+            rect = self.all_enemies[0].get_rect()
+            rect.unionall_ip([e.get_rect() for e in self.all_enemies])
+            self._bounds = (rect.left, rect.top, rect.right, rect.bottom)
+        return self._bounds
 
     def get_rect(self):
-        rect = self.all_enemies[0].get_rect()
-        for e in self.all_enemies:
-            rect.union_ip(e.get_rect())
+        left, top, right, bottom = self.get_bounds()
+        return pygame.rect.Rect(left, top, right - left, bottom - top)
 
+    def get_rect_ip(self, rect):
+        left, top, right, bottom = self.get_bounds()
+        rect.update(left, top, right - left, bottom - top)
         return rect
 
     def set_pos(self, new_pos):
-        self._update_pos(new_pos-self._pos)
-        self._pos = new_pos
+        self.translate_ip(new_pos[0] - self._pos.x, new_pos[1] - self._pos.y)
 
     def enemies_by_type(self, type):
         if type.ENEMY_TYPE in self.enemies:
@@ -515,6 +1241,7 @@ class EnemyGroup(GameObject):
     def clear(self):
         for enemy in self.all_enemies:
             enemy.on_removed_event.remove(self.on_child_removed)
+            enemy.detach()
             WorldHelper.remove(enemy)
 
         self.enemies.clear()
@@ -528,15 +1255,17 @@ class EnemyGroup(GameObject):
         rect = self.get_rect()
         my_x = rect.center[0]
         sc_x = WorldHelper.screen_rect.width / 2
-        self._update_pos((sc_x - my_x, 0))
+        self._update_pos(sc_x - my_x, 0)
 
     def set_top(self, y):
         rect = self.get_rect()
         my_top = rect.top
-        self._update_pos((0, y - my_top))
+        self._update_pos(0, y - my_top)
 
 
 class EnemyRect(EnemyGroup):
+    __slots__ = ()
+
     def _create_enemy(self, type, offset):
         p = Vector2(self._pos)
         e = type()
@@ -573,6 +1302,7 @@ class Parent(GameObject):
     This class is a parent for one object,
     removes itself when child is removed from world
     '''
+    __slots__ = ('child',)
 
     def __init__(self):
         super(Parent, self).__init__()
@@ -599,6 +1329,7 @@ class Parent(GameObject):
 
 class Movement(Parent):
     OBJECT_TYPE = 'movement'
+    __slots__ = ()
 
 
 class MovementPath(Movement):
@@ -607,6 +1338,8 @@ class MovementPath(Movement):
     0.0 is the start of animation
     1.0 is the end
     '''
+    __slots__ = ('_time', 't', 'loop', '_dir')
+
     def __init__(self, time):
         super(MovementPath, self).__init__()
         self._time = time
@@ -652,16 +1385,28 @@ class MovementPath(Movement):
 
 
 class MovementLinear(MovementPath):
+    __slots__ = ('_p1', '_p2')
+
     def __init__(self, time, p1, p2):
         super(MovementLinear, self).__init__(time)
         self._p1 = Vector2(p1)
         self._p2 = Vector2(p2)
 
     def get_current(self):
-        return self._p1.lerp(self._p2, self.t)
+        return self.get_at(self.t)
+
+    def get_at(self, t):
+        '''Position at normalized time t, self.t is not changed'''
+        return self._p1.lerp(self._p2, t)
+
+    def curve(self):
+        '''Quadratic Bezier control points of the line, for PathBatch'''
+        return self._p1, (self._p1 + self._p2) / 2, self._p2
 
 
 class MovementLinearVel(MovementLinear):
+    __slots__ = ()
+
     def __init__(self, p1, p2, velocity):
         p1 = Vector2(p1)
         p2 = Vector2(p2)
@@ -671,6 +1416,8 @@ class MovementLinearVel(MovementLinear):
 
 
 class MovementBezier(MovementPath):
+    __slots__ = ('_p0', '_p1', '_p2')
+
     def __init__(self, time, p0, p1, p2):
         super(MovementBezier, self).__init__(time)
         self._p0 = Vector2(p0)
@@ -678,36 +1425,72 @@ class MovementBezier(MovementPath):
         self._p2 = Vector2(p2)
 
     def get_current(self):
-        x1 = self._p0.lerp(self._p1, self.t)
-        x2 = self._p1.lerp(self._p2, self.t)
-        return x1.lerp(x2, self.t)
+        return self.get_at(self.t)
+
+    def get_at(self, t):
+        x1 = self._p0.lerp(self._p1, t)
+        x2 = self._p1.lerp(self._p2, t)
+        return x1.lerp(x2, t)
+
+    def curve(self):
+        '''Control points, for PathBatch'''
+        return self._p0, self._p1, self._p2
 
 
 class MovementCompound(MovementPath):
-    def __init__(self):
+    '''
+    Movements one after another.
+    When baked, lines and Bezier curves are followed at constant speed
+    through shared ArcLengthTables
+    '''
+    __slots__ = ('_moves', '_ends', '_tables', 'baked')
+
+    def __init__(self, baked=False):
         super(MovementCompound, self).__init__(0)
         self._moves = []
+        self._ends = []  # Time at which each move ends
+        self._tables = []  # ArcLengthTable of each move or None
+        self.baked = baked
 
     def append(self, move):
         self._time += move.get_total_time()
         self._moves.append(move)
+        self._ends.append(self._time)
+        table = None
+        if self.baked and hasattr(move, 'curve'):
+            table = ArcLengthTable.get(*move.curve())
+        self._tables.append(table)
+
+    def _segment(self, t):
+        '''Returns (index of the move, time into it) at absolute time t'''
+        i = min(bisect.bisect_left(self._ends, t), len(self._moves) - 1)
+        start_time = self._ends[i - 1] if i > 0 else 0
+        return i, t - start_time
 
     def get_current_movement(self):
-        t = self.t * self._time  # convert normalized time
-        end_time = 0
-        for move in self._moves:
-            start_time = end_time  # starting time of this move
-            end_time += move.get_total_time()
-            if t <= end_time:  # if t is in between start and end
-                move.set_abs_time(t - start_time)
-                return move
+        '''The current move, its time is set to the current one'''
+        i, t = self._segment(self.t * self._time)
+        move = self._moves[i]
+        move.set_abs_time(t)
+        return move
 
     def get_current(self):
-        move = self.get_current_movement()
-        return move.get_current()
+        return self.get_at(self.t)
+
+    def get_at(self, t):
+        i, move_time = self._segment(t * self._time)
+        move = self._moves[i]
+        total = move.get_total_time()
+        move_t = move_time / total if total > 0 else 1
+        table = self._tables[i]
+        if table is not None:
+            return Vector2(table.point(move_t))
+        return move.get_at(move_t)
 
 
 class MovementAccelDown(Parent):
+    __slots__ = ('accel', 'max_vel', 'cur_vel')
+
     def __init__(self, time, max_vel):
         super(MovementAccelDown, self).__init__()
         self.accel = max_vel / time
@@ -727,10 +1510,17 @@ class MovementGroupSpawn(MovementPath):
     STARTING_POS = (-50, 400)
     DELAY = 0.2
     ONE_CURVE_TIME = 1
+    __slots__ = ('_after_movement', 'number', 'index', '_enemies',
+                 '_paths')
 
     def __init__(self):
         super(MovementGroupSpawn, self).__init__(0)
         self._after_movement = None
+        # Set by reset
+        self.number = 0
+        self.index = 0
+        self._enemies = []
+        self._paths = PathBatch()
 
     def set_child(self, child):
         super(MovementGroupSpawn, self).set_child(child)
@@ -750,39 +1540,31 @@ class MovementGroupSpawn(MovementPath):
         delay_time = (self.number-1) * self.DELAY
         self._time = delay_time + self.ONE_CURVE_TIME
 
-        index = 0
-        for e in self.child.all_enemies:
-            delay = index * self.DELAY
-
+        # One curve per enemy, in the same order
+        self._enemies = list(self.child.all_enemies)
+        self._paths = PathBatch()
+        for index, e in enumerate(self._enemies):
             end_pos = e.get_pos()
-            index += 1
-
-            bezier = MovementBezier(self.ONE_CURVE_TIME,
-                                    self.STARTING_POS,
-                                    (end_pos[0], self.STARTING_POS[1]),
-                                    end_pos)
-
-            e.bezier = bezier
-            bezier.delay = delay
+            self._paths.add(self.STARTING_POS,
+                            (end_pos[0], self.STARTING_POS[1]),
+                            end_pos,
+                            index * self.DELAY, self.ONE_CURVE_TIME)
             # e.set_pos(self.STARTING_POS)
 
     def update(self, dt):
         self.seek(dt)
-        for e in self.child.all_enemies:
-            bezier = e.bezier
-
-            start_time = bezier.delay
-            end_time = start_time + bezier.get_total_time()
 
-            t = self.t * self._time
-            if t < start_time:
-                bezier.t = 0
-            elif t > end_time:
-                bezier.t = 1
-            else:
-                bezier.set_abs_time(t - start_time)
+        # Enemies killed or gone diving since the last update
+        if len(self.child.all_enemies) != len(self._enemies):
+            members = set(self.child.all_enemies)
+            mask = [e in members for e in self._enemies]
+            self._paths.keep(mask)
+            self._enemies = [e for e in self._enemies if e in members]
 
-            e.set_pos(bezier.get_current())
+        positions = self._paths.evaluate(self.t * self._time)
+        for e, pos in zip(self._enemies, positions):
+            e.set_pos(pos)
+        self.child.invalidate_bounds()
 
     def on_finished(self):
         super(MovementGroupSpawn, self).on_finished()
@@ -796,6 +1578,8 @@ class MovmentClassic(Movement):
     STEP_Y = 60
     PADDING_X = 50
     LOWER_LIMIT = 720
+    __slots__ = ('speed_x', 'step_y', 'dir', '_residual', 'on_under_screen',
+                 'lower_limit')
 
     def __init__(self):
         super(MovmentClassic, self).__init__()
@@ -806,14 +1590,9 @@ class MovmentClassic(Movement):
         self.on_under_screen = None
         self.lower_limit = self.LOWER_LIMIT
 
-    def set_child(self, child):
-        super(MovmentClassic, self).set_child(child)
-        self._rect = child.get_rect()
-        self._left = self._rect.left
-        self._right = self._rect.right
-        self._bottom = self._rect.bottom
-
     def update(self, delta_time):
+        # The formation as it is now, enemies on the edges may have died
+        left, top, right, bottom = self.child.get_bounds()
         offset_x = delta_time * self.speed_x
         if not self.dir:
             offset_x *= -1
@@ -822,26 +1601,23 @@ class MovmentClassic(Movement):
         sc.width -= self.PADDING_X * 2
         sc.left = self.PADDING_X
 
-        if self._right + offset_x > sc.right:
-            offset_x = sc.right - self._right
+        if right + offset_x > sc.right:
+            offset_x = sc.right - right
             offset_y = self.step_y
             self.check_under_screen(offset_y)
             self.dir = False
 
-        if self._left + offset_x < sc.left:
-            offset_x = sc.left-self._left
+        if left + offset_x < sc.left:
+            offset_x = sc.left - left
             offset_y = self.step_y
             self.check_under_screen(offset_y)
             self.dir = True
 
-        self._right += offset_x
-        self._left += offset_x
-
-        self.child.move(Vector2(offset_x, offset_y))
+        self.child.translate_ip(offset_x, offset_y)
 
     def check_under_screen(self, offset_y):
-        self._bottom += offset_y
-        if self._bottom > self.lower_limit and\
+        bottom = self.child.get_bounds()[3] + offset_y
+        if bottom > self.lower_limit and\
            self.on_under_screen is not None:
             self.on_under_screen()
 
@@ -849,6 +1625,7 @@ class MovmentClassic(Movement):
 class ShooterPeriodic(Parent):
     OBJECT_TYPE = 'shooter_pattern'
     INTERVAL = 1.0
+    __slots__ = ('interval', '_time')
 
     def __init__(self):
         super(ShooterPeriodic, self).__init__()
@@ -872,6 +1649,8 @@ class ShooterPeriodic(Parent):
 
 
 class ShooterPeriodicVary(ShooterPeriodic):
+    __slots__ = ('min_timeout', 'max_timeout', 'variance')
+
     def __init__(self):
         super(ShooterPeriodicVary, self).__init__()
         self.min_timeout = 0.1
@@ -889,6 +1668,8 @@ class ShooterPeriodicVary(ShooterPeriodic):
 
 
 class ShooterGroup(ShooterPeriodicVary):
+    __slots__ = ('max_enemies_shooting',)
+
     def __init__(self):
         super(ShooterGroup, self).__init__()
         self.max_enemies_shooting = 1
@@ -901,6 +1682,7 @@ class ShooterGroup(ShooterPeriodicVary):
 
 class ShooterGroupDiver(ShooterGroup):
     OBJECT_TYPE = 'shooter_pattern_diver'
+    __slots__ = ()
 
     def shoot(self):
         if not self.child.dive():
@@ -910,6 +1692,8 @@ class ShooterGroupDiver(ShooterGroup):
 class Meteor(SpriteGameObject):
     OBJECT_TYPE = 'meteor'
     SPEED = 1000
+    POOL_CAPACITY = 32
+    __slots__ = ('_inside_screen',)
 
     def __init__(self):
         super(Meteor, self).__init__()
@@ -917,6 +1701,12 @@ class Meteor(SpriteGameObject):
         self.speed.x = self.SPEED
         self.speed.rotate_ip(30)
 
+    def on_acquire(self):
+        super(Meteor, self).on_acquire()
+        self._inside_screen = False
+        self.speed.x = self.SPEED
+        self.speed.rotate_ip(30)
+
     def update(self, dt):
         super(Meteor, self).update(dt)
         if self.inside_screen(WorldHelper.screen_rect):
@@ -929,6 +1719,7 @@ class Meteor(SpriteGameObject):
 
 class MeteorBig(Meteor):
     SPRITE_NAME = 'meteor_big'
+    __slots__ = ()
 
 
 class MeteorGenerator(ShooterPeriodic):
@@ -936,6 +1727,7 @@ class MeteorGenerator(ShooterPeriodic):
     INTERVAL = 1
     UPPER_LIMIT = -300
     LOWER_LIMIT = 500
+    __slots__ = ('life_time',)
 
     def __init__(self, life_time):
         super(MeteorGenerator, self).__init__()
@@ -949,7 +1741,7 @@ class MeteorGenerator(ShooterPeriodic):
             WorldHelper.remove(self)
 
     def spawn(self):
-        meteor = MeteorBig()
+        meteor = MeteorBig.acquire()
         meteor.set_pos((-100, random.randint(self.UPPER_LIMIT,
                                              self.LOWER_LIMIT)))
         WorldHelper.append(meteor)
@@ -979,28 +1771,61 @@ class ProgressBar:
             pygame.draw.rect(self._surf, self.color1, self._rect)
             pygame.draw.rect(self._surf, self.BORDER_COLOR,
                              self._surf.get_rect(), self.PADDING)
-            self.last_val = val
+            self._last_val = val
 
     def draw(self, surface, pos):
-        surface.blit(self._surf, pos)
+        return surface.blit(self._surf, pos)
+
+    def blit_item(self, pos):
+        '''Returns (surface, dest) for Surface.blits'''
+        return (self._surf, pos)
 
 
 class TextUI:
+    '''Text rendered on first use, after every change'''
     def __init__(self, init_val='Testing', color=(255, 255, 255), size=24):
-        self._font = pygame.font.Font(None, size)
+        self.size = size
         self.color = color
-        self._last_text = ''
-        self.set_test(init_val)
+        self._text = init_val
+        self._surf = None
+
+    def _get_surf(self):
+        if self._surf is None:
+            self._surf = text_cache.render(Fonts.get(self.size),
+                                           self._text, self.color)
+        return self._surf
 
     def draw(self, surface, pos):
-        surface.blit(self._surf, pos)
+        return surface.blit(self._get_surf(), pos)
+
+    def blit_item(self, pos):
+        '''Returns (surface, dest) for Surface.blits'''
+        return (self._get_surf(), pos)
 
     def set_test(self, text):
-        if self._last_text != text:
-            self._surf = self._font.render(text, False, self.color)
-            self._last_text = text
+        if self._text != text:
+            self._text = text
+            self._surf = None
 
     def top_left_to_center(self, top_left):
-        rect = self._surf.get_rect()
+        rect = self._get_surf().get_rect()
         return (top_left[0] - rect.width/2,
                 top_left[1] - rect.height/2)
+
+
+class NumberUI(TextUI):
+    '''TextUI of a prefix and a number, see fonts.NumberText'''
+    def __init__(self, prefix, color=(255, 255, 255), size=24):
+        super(NumberUI, self).__init__(prefix, color, size)
+        self._number = None
+        self._value = 0
+
+    def _get_surf(self):
+        if self._number is None:
+            self._number = NumberText(Fonts.get(self.size),
+                                      self._text, self.color)
+        self._number.set_value(self._value)
+        return self._number.surface
+
+    def set_value(self, value):
+        self._value = value
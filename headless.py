@@ -0,0 +1,189 @@
+#!/usr/bin/python3
+'''
+Runs the game simulation without a window, as fast as the CPU allows,
+with an autopilot moving the player and shooting.
+
+    python3 headless.py --ticks 10000 --seed 1 --waves 1-6
+'''
+import os
+import sys
+import argparse
+import random
+import time
+
+# Must be set before pygame.display is initialized
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+import pygame  # noqa: E402
+import gameobjects  # noqa: E402
+import controller  # noqa: E402
+
+RES_X = 1280
+RES_Y = 720
+
+
+def init_display(size=(RES_X, RES_Y)):
+    '''
+    Opens a display on the dummy video driver
+    and loads the sprites, returns the display surface
+    '''
+    # Sprites paths are relative to the project
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+
+    pygame.display.init()
+    pygame.font.init()
+    display = pygame.display.set_mode(size)
+
+    gameobjects.ResourcesLoader.__init__()
+    gameobjects.WorldHelper.screen_rect = display.get_rect()
+    return display
+
+
+class HeadlessEvents:
+    '''Same interface as main.GameEvents'''
+    def __init__(self):
+        self.lost = False
+        self.deaths = 0
+        self.invulnerable = False
+
+    def on_lost(self):
+        if self.invulnerable:
+            return
+        if not self.lost:
+            self.lost = True
+            self.deaths += 1
+
+    def on_pause(self):
+        pass
+
+    def on_reset(self):
+        pass
+
+
+class Simulation:
+    '''
+    Steps Components with a constant delta time,
+    the game is reset when the player loses
+    '''
+    PLAYER_Y = RES_Y * 0.9
+    SWEEP_TIME = 4  # seconds for the player to cross the screen
+    FIRE_INTERVAL = 0.25
+
+    def __init__(self, display, first_wave=1, last_wave=None, render=False,
+                 invulnerable=False):
+        self.game_state = HeadlessEvents()
+        self.game_state.invulnerable = invulnerable
+        self.game = controller.Components(self.game_state)
+        self.updater = controller.Updater(self.game)
+        self.render = None
+        if render:
+            self.render = controller.Render(self.game, display)
+
+        self._screen_width = display.get_width()
+        self.first_wave = first_wave
+        self.last_wave = last_wave
+        self.ticks = 0
+        self.time = 0
+        self.waves_spawned = 0
+        self._fire_time = 0
+        self._set_waves()
+
+    def _set_waves(self):
+        spawner = self.game.spawner
+        if self.first_wave != 1 or self.last_wave is not None:
+            spawner.set_wave_range(self.first_wave, self.last_wave)
+
+    def autopilot(self, dt):
+        # Back and forth over the screen
+        phase = (self.time / self.SWEEP_TIME) % 2
+        if phase > 1:
+            phase = 2 - phase
+        self.game.player.set_pos((phase * self._screen_width,
+                                  self.PLAYER_Y))
+
+        self._fire_time -= dt
+        if self._fire_time <= 0:
+            self._fire_time += self.FIRE_INTERVAL
+            self.game.player.shoot()
+
+    def reset(self):
+        self.waves_spawned += self.game.spawner.waves_spawned
+        self.game.reset()
+        self.game_state.lost = False
+        self._set_waves()
+
+    def tick(self, dt):
+        self.autopilot(dt)
+        self.updater.update_world(dt)
+        if self.render is not None:
+            self.render.draw(dt)
+        else:
+            self.game.animator.update(dt)
+
+        self.ticks += 1
+        self.time += dt
+        if self.game_state.lost:
+            self.reset()
+
+    def stats(self):
+        game = self.game
+        stats = {
+            'ticks': self.ticks,
+            'sim_time': round(self.time, 2),
+            'deaths': self.game_state.deaths,
+            'score': game.player.score,
+            'wave': game.spawner.next_wave_index - 1,
+            'waves_spawned': self.waves_spawned + game.spawner.waves_spawned,
+            'pool_hits': sum(game.world.pool.hits.values()),
+            'pool_misses': sum(game.world.pool.misses.values()),
+        }
+        if game.projectiles is not None:
+            stats['projectiles'] = len(game.projectiles)
+        for type_name, objects in game.world.get_main_dic().items():
+            stats['objects.' + type_name] = len(objects)
+        return stats
+
+
+def parse_waves(text):
+    '''"3" or "1-6", returns (first, last)'''
+    if '-' in text:
+        first, last = text.split('-')
+        return int(first), int(last)
+    return int(text), int(text)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    parser.add_argument('--ticks', type=int, default=10000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--waves', default='1-6',
+                        help='wave range to cycle through, e.g. 1-6')
+    parser.add_argument('--tick-rate', type=int, default=60,
+                        help='simulated ticks per second of game time')
+    parser.add_argument('--render', action='store_true',
+                        help='also draw every tick to the offscreen display')
+    parser.add_argument('--invulnerable', action='store_true',
+                        help='the player never loses')
+    args = parser.parse_args(argv)
+
+    random.seed(args.seed)
+    first, last = parse_waves(args.waves)
+    display = init_display()
+    sim = Simulation(display, first, last, args.render, args.invulnerable)
+
+    dt = 1.0 / args.tick_rate
+    start = time.perf_counter()
+    for i in range(args.ticks):
+        sim.tick(dt)
+    elapsed = time.perf_counter() - start
+
+    print('{} ticks in {:.2f}s, {:.0f} ticks/sec'.format(
+        args.ticks, elapsed, args.ticks / elapsed))
+    for key, value in sim.stats().items():
+        print('{}: {}'.format(key, value))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
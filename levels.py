@@ -17,7 +17,12 @@ class EnemyTemplate:
 class Waves:
     '''
     Static structure for holding waves information,
+    WAVE_N_TYPES are the object types wave_N creates
     '''
+    # What dies, drops and is picked up in every wave
+    COMMON_TYPES = (gameobjects.Explosion, gameobjects.PowerupWeapon,
+                    gameobjects.PowerupShield, gameobjects.PowerupHealth,
+                    gameobjects.shield_1)
 
     def _classic_group():
         mover = gameobjects.MovmentClassic()
@@ -44,6 +49,8 @@ class Waves:
 
         return eg
 
+    WAVE_1_TYPES = (gameobjects.Enemy,)
+
     def wave_1(player):
         egt = Waves._classic_group()
         egt.enemy.uniform_rectangle(7, 3, gameobjects.Enemy)
@@ -52,6 +59,8 @@ class Waves:
         egt.setup()
         return [egt]
 
+    WAVE_2_TYPES = (gameobjects.Enemy, gameobjects.Enemy2)
+
     def wave_2(player):
         egt = Waves._classic_group()
         egt.enemy.mixed_rows(7, [gameobjects.Enemy] * 3 +
@@ -61,6 +70,8 @@ class Waves:
         egt.setup()
         return [egt]
 
+    WAVE_3_TYPES = (gameobjects.EnemyTargtedBullet,)
+
     def wave_3(player):
         eg = gameobjects.EnemyGroup()
         for x in range(0, 4):
@@ -79,12 +90,17 @@ class Waves:
         egt.setup()
         return [egt]
 
+    # wave_5 without the mover of wave_3
+    WAVE_4_TYPES = WAVE_2_TYPES + WAVE_3_TYPES
+
     def wave_4(player):
         eg, es = Waves.wave_5(player)
         es.mover.unset_child()
         es.mover = None
         return [eg, es]
 
+    WAVE_5_TYPES = WAVE_2_TYPES + WAVE_3_TYPES
+
     def wave_5(player):
         es = Waves.wave_3(player)
         eg = Waves.wave_2(player)
@@ -94,10 +110,29 @@ class Waves:
 
         return eg + es
 
+    WAVE_6_TYPES = (gameobjects.MeteorBig,)
+
     def wave_6(player):
         meteorgen = gameobjects.MeteorGenerator(60)
         return [EnemyTemplate(meteorgen, None, None)]
 
+    WAVES_TYPES = (WAVE_1_TYPES, WAVE_2_TYPES, WAVE_3_TYPES,
+                   WAVE_4_TYPES, WAVE_5_TYPES, WAVE_6_TYPES)
+
+    def sprites_of(wave_number):
+        '''Names of the sprites a wave uses, for ResourcesLoader.prefetch'''
+        types = list(Waves.COMMON_TYPES)
+        if wave_number <= len(Waves.WAVES_TYPES):
+            types += Waves.WAVES_TYPES[wave_number - 1]
+        # And the bullets the enemies shoot
+        types += [type.BULLET for type in types if hasattr(type, 'BULLET')]
+
+        names = []
+        for type in types:
+            if type.SPRITE_NAME not in names:
+                names.append(type.SPRITE_NAME)
+        return names
+
     def create_wave(wave_number, player):
         """
         Creates wave based on predefined waves,
@@ -1,8 +1,10 @@
 #!/usr/bin/python3
+import time
 import pygame
 import gameobjects
 import controller
 from TextDebugger import Renderer as Debugger
+from fonts import text_cache
 
 
 RES_X = 1280
@@ -12,6 +14,11 @@ RES_Y = 720
 paused = False
 dead = False
 total_dt = 0
+# Created on the first debug call
+debugger = None
+# (phase, time.perf_counter()) at the end of each startup phase,
+# read by benchmarks/coldstart.py
+startup_marks = []
 
 
 class GameEvents:
@@ -21,15 +28,23 @@ class GameEvents:
         self.on_reset = None
 
 
+def mark(phase):
+    startup_marks.append((phase, time.perf_counter()))
+
+
 def init_window():
-    pygame.init()
+    # The game has no sound, only the display is needed.
+    # pygame.font is initialized by the first font
+    pygame.display.init()
     display = pygame.display.set_mode(size=(RES_X, RES_Y))
     pygame.mouse.set_visible(False)
     pygame.mouse.set_pos((RES_X / 2, RES_Y * 0.9))
+    mark('display')
 
     # init sprites
     gameobjects.ResourcesLoader.__init__()
     gameobjects.WorldHelper.screen_rect = display.get_rect()
+    mark('resources')
     return display
 
 
@@ -61,7 +76,11 @@ def on_reset():
 
 
 def debug(dt):
-    global display, game, debugger, updater
+    global display, game, debugger, updater, render
+    if debugger is None:
+        debugger = Debugger()
+        # Drawn by render, before it lists the regions to update
+        render.add_overlay(debugger.render)
     debugger.clear()
 
     fps = int(1 / dt)
@@ -79,7 +98,27 @@ def debug(dt):
     for type_name, array in dic:
         debugger.add('{}: {}'.format(type_name, len(array)))
 
-    debugger.render(display)
+    pool = game.world.pool
+    debugger.add('pool hits: {} misses: {}'.format(
+        sum(pool.hits.values()), sum(pool.misses.values())))
+
+    debugger.add('text cache hits: {} misses: {}'.format(
+        text_cache.hits, text_cache.misses))
+    debugger.add('hud rebuilds: {} ({:.1f}/s)'.format(
+        game.gui.rebuilds, game.gui.rebuild_rate))
+
+    if game.projectiles is not None:
+        debugger.add('live projectiles: {}'.format(len(game.projectiles)))
+
+    timer = game.timer
+    if timer.enabled:
+        debugger.add('ms min/avg/p99')
+        for name in timer.phases:
+            debugger.add('{}: {:.2f} / {:.2f} / {:.2f}'.format(
+                name, *[v * 1000 for v in timer.stats(name)]))
+        debugger.add('frame: {:.2f} / {:.2f} / {:.2f}'.format(
+            *[v * 1000 for v in timer.stats()]))
+        debugger.set_graph(timer.frame_times(), 2.0 / controller.Updater.FPS_LIMIT)
 
 
 def debug_rect():
@@ -89,33 +128,47 @@ def debug_rect():
         pygame.draw.rect(display, (255, 255, 255), obj.get_rect(), 1)
 
 
-display = init_window()
+def main(frames=None):
+    '''Runs the game, frames stops it after that many frames'''
+    global display, game_state, game, updater, render, cont, total_dt
+
+    display = init_window()
+
+    game_state = GameEvents()
+    game_state.on_pause = on_pause
+    game_state.on_lost = on_lost
+    game_state.on_reset = on_reset
 
-debugger = Debugger()
+    game = controller.Components(game_state)
+    updater = controller.Updater(game)
+    updater.fixed_step = True
+    render = controller.Render(game, display)
 
-game_state = GameEvents()
-game_state.on_pause = on_pause
-game_state.on_lost = on_lost
-game_state.on_reset = on_reset
+    cont = controller.Controller(game, updater)
+    mark('components')
 
-game = controller.Components(game_state)
-updater = controller.Updater(game)
-render = controller.Render(game, display)
+    frame = 0
+    while frames is None or frame < frames:
+        if not updater.pygame_events(cont):
+            break
 
-cont = controller.Controller(game, updater)
+        dt = updater.update_all(paused)
+        # Presents what the first iteration drew
+        if frame == 1:
+            mark('first_frame')
+        cont.update_player_pos()
+        total_dt += dt
 
-while True:
-    if not updater.pygame_events(cont):
-        break
+        if dead or not paused:
+            debug(dt)
+            render.draw(dt, updater.alpha, updater.previous_positions)
+            # debug_rect()
 
-    dt = updater.update_all(paused)
-    cont.update_player_pos()
-    total_dt += dt
+        game.timer.end_frame()
+        frame += 1
 
-    if dead or not paused:
-        render.draw(dt)
-        debug(dt)
-        # debug_rect()
+    print('Goodbye')
 
 
-print('Goodbye')
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+'''
+Batched evaluation of movement curves
+and arc length tables of single curves
+'''
+import bisect
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class PathBatch:
+    '''
+    Quadratic Bezier curves (p0, p1, p2) evaluated all at once.
+    Curve i starts delays[i] seconds after the batch does
+    and lasts durations[i] seconds, before and after that
+    it stays at its first and last point.
+
+    A straight line is a curve with p1 in the middle of p0 and p2.
+    Uses numpy when available.
+    '''
+    def __init__(self):
+        self._p0 = []
+        self._p1 = []
+        self._p2 = []
+        self._delays = []
+        self._durations = []
+        self._arrays = None  # Built on the first evaluate
+
+    def __len__(self):
+        return len(self._delays)
+
+    def add(self, p0, p1, p2, delay=0, duration=1):
+        '''Returns the index of the curve'''
+        self._p0.append((p0[0], p0[1]))
+        self._p1.append((p1[0], p1[1]))
+        self._p2.append((p2[0], p2[1]))
+        self._delays.append(delay)
+        # A curve of no duration jumps to its end at its delay
+        self._durations.append(max(duration, 1e-9))
+        self._arrays = None
+        return len(self._delays) - 1
+
+    def add_movement(self, movement, delay=0):
+        '''Adds a MovementLinear or MovementBezier'''
+        p0, p1, p2 = movement.curve()
+        return self.add(p0, p1, p2, delay, movement.get_total_time())
+
+    def keep(self, mask):
+        '''Keeps the curves where mask is True, in order'''
+        for name in ('_p0', '_p1', '_p2', '_delays', '_durations'):
+            setattr(self, name,
+                    [v for v, k in zip(getattr(self, name), mask) if k])
+        self._arrays = None
+
+    def evaluate(self, time):
+        '''Returns the positions at time as a list of (x, y)'''
+        if numpy is None:
+            return [self._point(i, time) for i in range(len(self))]
+
+        if self._arrays is None:
+            self._arrays = (numpy.array(self._p0, dtype=float),
+                            numpy.array(self._p1, dtype=float),
+                            numpy.array(self._p2, dtype=float),
+                            numpy.array(self._delays, dtype=float),
+                            numpy.array(self._durations, dtype=float))
+        p0, p1, p2, delays, durations = self._arrays
+        if len(delays) == 0:
+            return []
+
+        t = numpy.clip((time - delays) / durations, 0, 1)[:, None]
+        u = 1 - t
+        return (u * u * p0 + 2 * u * t * p1 + t * t * p2).tolist()
+
+    def _point(self, i, time):
+        t = min(max((time - self._delays[i]) / self._durations[i], 0), 1)
+        return bezier_point(self._p0[i], self._p1[i], self._p2[i], t)
+
+
+def bezier_point(p0, p1, p2, t):
+    u = 1 - t
+    return (u * u * p0[0] + 2 * u * t * p1[0] + t * t * p2[0],
+            u * u * p0[1] + 2 * u * t * p1[1] + t * t * p2[1])
+
+
+class ArcLengthTable:
+    '''
+    A quadratic Bezier sampled by distance travelled,
+    point(s) is s (0 to 1) of the way along the curve,
+    so the curve is followed at constant speed.
+
+    Tables are shared, get bakes each curve only once
+    '''
+    SAMPLES = 64
+    # Key: control points and samples
+    _tables = {}
+
+    def get(p0, p1, p2, samples=SAMPLES):
+        key = (p0[0], p0[1], p1[0], p1[1], p2[0], p2[1], samples)
+        table = ArcLengthTable._tables.get(key)
+        if table is None:
+            table = ArcLengthTable(p0, p1, p2, samples)
+            ArcLengthTable._tables[key] = table
+        return table
+
+    def count():
+        '''Number of tables baked'''
+        return len(ArcLengthTable._tables)
+
+    def clear():
+        ArcLengthTable._tables.clear()
+
+    def __init__(self, p0, p1, p2, samples=SAMPLES):
+        self.points = [bezier_point(p0, p1, p2, i / samples)
+                       for i in range(samples + 1)]
+        # Distance from the start to each point
+        self.lengths = [0]
+        for a, b in zip(self.points, self.points[1:]):
+            self.lengths.append(self.lengths[-1] +
+                                ((b[0] - a[0]) ** 2 +
+                                 (b[1] - a[1]) ** 2) ** 0.5)
+        self.length = self.lengths[-1]
+
+    def point(self, s):
+        distance = min(max(s, 0), 1) * self.length
+        i = bisect.bisect_left(self.lengths, distance)
+        if i == 0:
+            return self.points[0]
+        start, end = self.lengths[i - 1], self.lengths[i]
+        a, b = self.points[i - 1], self.points[i]
+        f = (distance - start) / (end - start)
+        return (a[0] + (b[0] - a[0]) * f, a[1] + (b[1] - a[1]) * f)
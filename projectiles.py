@@ -0,0 +1,200 @@
+import gameobjects
+from gameobjects import WorldHelper, GameObject, ResourcesLoader
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class ProjectileBuffer:
+    '''
+    Struct of arrays storage for one kind of projectiles,
+    live entries are always packed in [0, count).
+    previous is the position before the last integrate
+    '''
+    ARRAYS = ('pos', 'previous', 'vel', 'damage', 'sprite')
+
+    def __init__(self, capacity=256):
+        self.count = 0
+        self.pos = numpy.zeros((capacity, 2))
+        self.previous = numpy.zeros((capacity, 2))
+        self.vel = numpy.zeros((capacity, 2))
+        self.damage = numpy.zeros(capacity)
+        self.sprite = numpy.zeros(capacity, dtype=numpy.intp)
+
+    def __len__(self):
+        return self.count
+
+    def _grow(self):
+        capacity = len(self.damage) * 2
+        for name in self.ARRAYS:
+            old = getattr(self, name)
+            new = numpy.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:self.count] = old[:self.count]
+            setattr(self, name, new)
+
+    def spawn(self, pos, vel, damage, sprite_id):
+        if self.count == len(self.damage):
+            self._grow()
+        i = self.count
+        self.pos[i] = pos[0], pos[1]
+        self.previous[i] = pos[0], pos[1]
+        self.vel[i] = vel[0], vel[1]
+        self.damage[i] = damage
+        self.sprite[i] = sprite_id
+        self.count += 1
+
+    def integrate(self, dt):
+        n = self.count
+        self.previous[:n] = self.pos[:n]
+        self.pos[:n] += self.vel[:n] * dt
+
+    def lerp(self, alpha):
+        '''Positions between previous (alpha 0) and pos'''
+        n = self.count
+        previous = self.previous[:n]
+        return previous + (self.pos[:n] - previous) * alpha
+
+    def boxes(self, half_sizes):
+        '''
+        Returns (count, 4) array of left, top, right, bottom,
+        half_sizes is indexed by sprite id
+        '''
+        n = self.count
+        half = half_sizes[self.sprite[:n]]
+        return numpy.concatenate((self.pos[:n] - half,
+                                  self.pos[:n] + half), axis=1)
+
+    def keep(self, mask):
+        '''Compacts the arrays, keeping entries where mask is True'''
+        n = self.count
+        alive = int(mask.sum())
+        if alive == n:
+            return
+        for name in self.ARRAYS:
+            arr = getattr(self, name)
+            arr[:alive] = arr[:n][mask]
+        self.count = alive
+
+    def kill(self, indices):
+        if len(indices) == 0:
+            return
+        mask = numpy.ones(self.count, dtype=bool)
+        mask[indices] = False
+        self.keep(mask)
+
+    def clear(self):
+        self.count = 0
+
+
+class ProjectileSystem(GameObject):
+    '''
+    Holds every live bullet in two buffers,
+    friendly (player) and hostile (enemy) ones.
+    Integrates, culls and draws all of them in bulk once per tick.
+
+    Bullet classes are only used as templates
+    (SPRITE_NAME, OBJECT_TYPE, DAMAGE, SPEED)
+    '''
+    OBJECT_TYPE = 'projectiles'
+    ENABLED = True
+    __slots__ = ('friendly', 'hostile', '_sprite_ids', '_images',
+                 '_blit_sources', '_draw_half', '_collision_half')
+
+    def available():
+        return numpy is not None and ProjectileSystem.ENABLED
+
+    def __init__(self):
+        super(ProjectileSystem, self).__init__()
+        self.friendly = ProjectileBuffer()
+        self.hostile = ProjectileBuffer()
+
+        # Indexed by sprite id
+        self._sprite_ids = {}
+        self._images = []
+        self._blit_sources = []  # (surface, area) for Surface.blits
+        self._draw_half = numpy.zeros((0, 2))
+        self._collision_half = numpy.zeros((0, 2))
+
+    def _sprite_id(self, type):
+        name = type.SPRITE_NAME
+        if name in self._sprite_ids:
+            return self._sprite_ids[name]
+
+        sprite = ResourcesLoader.sprites[name]
+        image = sprite.image
+        size = numpy.array(image.get_size(), dtype=float)
+        self._sprite_ids[name] = len(self._images)
+        self._images.append(image)
+        surface, dest, area = sprite.blit_item((0, 0), 0)
+        self._blit_sources.append((surface, area))
+        self._draw_half = numpy.vstack((self._draw_half, size / 2))
+        self._collision_half = numpy.vstack(
+            (self._collision_half, size * type.COLLISION_SCALE / 2))
+        return self._sprite_ids[name]
+
+    def buffer_of(self, type):
+        if type.OBJECT_TYPE == gameobjects.EBullet.OBJECT_TYPE:
+            return self.hostile
+        return self.friendly
+
+    def spawn(self, type, pos, speed=None):
+        if speed is None:
+            speed = (0, type.SPEED)
+        self.buffer_of(type).spawn(pos, speed, type.DAMAGE,
+                                   self._sprite_id(type))
+
+    def boxes(self, buffer):
+        return buffer.boxes(self._collision_half)
+
+    def hits(self, buffer, box):
+        '''
+        Returns indices of projectiles in buffer
+        overlapping box (left, top, right, bottom)
+        '''
+        b = self.boxes(buffer)
+        mask = ((b[:, 0] < box[2]) & (box[0] < b[:, 2]) &
+                (b[:, 1] < box[3]) & (box[1] < b[:, 3]))
+        return numpy.flatnonzero(mask)
+
+    def update(self, delta_time):
+        screen = WorldHelper.screen_rect
+        screen_box = (screen.left, screen.top, screen.right, screen.bottom)
+        for buffer in (self.friendly, self.hostile):
+            if buffer.count == 0:
+                continue
+            buffer.integrate(delta_time)
+            b = self.boxes(buffer)
+            buffer.keep((b[:, 0] < screen_box[2]) & (screen_box[0] < b[:, 2]) &
+                        (b[:, 1] < screen_box[3]) & (screen_box[1] < b[:, 3]))
+
+    def draw_batch(self, items, previous=None, alpha=1):
+        # Render draws the projectiles over every other object
+        pass
+
+    def draw_projectiles(self, items, alpha=1):
+        '''
+        draw_batch of every projectile, alpha between the positions
+        before (0) and after (1) the last update
+        '''
+        sources = self._blit_sources
+        for buffer in (self.friendly, self.hostile):
+            n = buffer.count
+            if n == 0:
+                continue
+            sprites = buffer.sprite[:n]
+            if alpha < 1:
+                pos = buffer.lerp(alpha)
+            else:
+                pos = buffer.pos[:n]
+            top_left = pos - self._draw_half[sprites]
+            items.extend([(sources[i][0], dest, sources[i][1])
+                          for i, dest in zip(sprites.tolist(),
+                                             top_left.tolist())])
+
+    def clear(self):
+        self.friendly.clear()
+        self.hostile.clear()
+
+    def __len__(self):
+        return self.friendly.count + self.hostile.count
@@ -0,0 +1,149 @@
+'''
+Compiled sprite cache.
+
+A single binary file with the sprite list (sprites_list.csv) and the
+pixel data of every frame, already sliced and in the display pixel format.
+The file is memory mapped and the frames are wrapped into Surfaces
+in place, nothing gets decoded on startup.
+
+Layout:
+    MAGIC
+    manifest length (uint32, little endian)
+    manifest (JSON)
+    padding up to ALIGN
+    frame pixels (BGRA rows, one frame after another)
+
+The manifest stores the size and mtime of the csv and of every png,
+the cache is ignored (and rebuilt by the caller) when any of them changed.
+'''
+import os
+import json
+import mmap
+import struct
+import pygame
+
+MAGIC = b'PYINVSPR'
+VERSION = 1
+PIXEL_FORMAT = 'BGRA'
+ALIGN = 64
+
+# Keeps the mapping alive, the cached Surfaces point into it
+_mapped = None
+
+
+def _stamp(path):
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def _is_fresh(manifest, list_path):
+    if manifest.get('version') != VERSION or \
+       manifest.get('format') != PIXEL_FORMAT:
+        return False
+    try:
+        if manifest['list'] != [list_path] + _stamp(list_path):
+            return False
+        for entry in manifest['sprites']:
+            if entry['stamp'] != _stamp(entry['path']):
+                return False
+    except OSError:
+        return False
+    return True
+
+
+def _masks():
+    return pygame.image.frombuffer(bytearray(4), (1, 1),
+                                   PIXEL_FORMAT).get_masks()
+
+
+def load(cache_path, list_path):
+    '''
+    Returns list of (name, path, tiles_x, tiles_y, fps, frames)
+    or None when there is no valid cache
+    '''
+    global _mapped
+    try:
+        with open(cache_path, 'rb') as file:
+            header = file.read(len(MAGIC) + 4)
+            if len(header) < len(MAGIC) + 4 or \
+               header[:len(MAGIC)] != MAGIC:
+                return None
+            length, = struct.unpack('<I', header[len(MAGIC):])
+            manifest = json.loads(file.read(length).decode('utf-8'))
+            if not _is_fresh(manifest, list_path):
+                return None
+            data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_COPY)
+    except (OSError, ValueError, KeyError):
+        return None
+
+    # Converting is only needed if the display uses another format
+    native = pygame.display.get_surface() is None or \
+        pygame.surface.Surface((1, 1), pygame.SRCALPHA, 32) \
+        .convert_alpha().get_masks() == _masks()
+
+    view = memoryview(data)
+    sprites = []
+    for entry in manifest['sprites']:
+        frames = []
+        for offset, w, h in entry['frames']:
+            # Truncated file
+            if offset + w * h * 4 > len(data):
+                return None
+            frame = pygame.image.frombuffer(view[offset:offset + w * h * 4],
+                                            (w, h), PIXEL_FORMAT)
+            if not native:
+                frame = frame.convert_alpha()
+            frames.append(frame)
+        sprites.append((entry['name'], entry['path'], entry['tiles_x'],
+                        entry['tiles_y'], entry['fps'], frames))
+    _mapped = data
+    return sprites
+
+
+def write(cache_path, list_path, sprites):
+    '''
+    sprites is a list of (name, path, tiles_x, tiles_y, fps, frames).
+    Returns False when the cache could not be written
+    '''
+    entries = []
+    pixels = []
+    offset = 0
+    for name, path, tiles_x, tiles_y, fps, frames in sprites:
+        rects = []
+        for frame in frames:
+            w, h = frame.get_size()
+            pixels.append(pygame.image.tobytes(frame, PIXEL_FORMAT))
+            rects.append([offset, w, h])
+            offset += w * h * 4
+        entries.append({'name': name, 'path': path, 'tiles_x': tiles_x,
+                        'tiles_y': tiles_y, 'fps': fps,
+                        'stamp': _stamp(path), 'frames': rects})
+
+    # Offsets are relative to the pixel data, make them absolute
+    manifest = {'version': VERSION, 'format': PIXEL_FORMAT,
+                'list': [list_path] + _stamp(list_path), 'sprites': entries}
+    start = 0
+    while True:
+        encoded = json.dumps(manifest).encode('utf-8')
+        header_size = len(MAGIC) + 4 + len(encoded)
+        aligned = -(-header_size // ALIGN) * ALIGN
+        if aligned == start:
+            break
+        for entry in entries:
+            for rect in entry['frames']:
+                rect[0] += aligned - start
+        start = aligned
+
+    temp_path = cache_path + '.tmp'
+    try:
+        with open(temp_path, 'wb') as file:
+            file.write(MAGIC)
+            file.write(struct.pack('<I', len(encoded)))
+            file.write(encoded)
+            file.write(bytes(start - header_size))
+            for data in pixels:
+                file.write(data)
+        os.replace(temp_path, cache_path)
+    except OSError:
+        return False
+    return True
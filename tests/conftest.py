@@ -0,0 +1,25 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+import headless  # noqa: E402
+import controller  # noqa: E402
+
+
+@pytest.fixture(scope='session')
+def display():
+    '''The dummy display, with the sprites loaded'''
+    return headless.init_display()
+
+
+@pytest.fixture
+def world(display):
+    '''An empty World wired into WorldHelper'''
+    return controller.World()
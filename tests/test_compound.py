@@ -0,0 +1,86 @@
+import random
+
+import pytest
+
+import gameobjects
+from paths import ArcLengthTable
+
+
+def moves():
+    return [gameobjects.MovementLinear(1, (0, 0), (100, 0)),
+            gameobjects.MovementBezier(0.5, (100, 0), (150, 0), (150, 50)),
+            gameobjects.MovementLinear(0.1, (150, 50), (150, 60)),
+            gameobjects.MovementLinear(2.3, (150, 60), (0, 60))]
+
+
+def compound(baked=False):
+    movement = gameobjects.MovementCompound(baked)
+    for move in moves():
+        movement.append(move)
+    return movement
+
+
+def linear_segment(movement, t):
+    '''The scan _segment replaced, the last move past the end'''
+    end_time = 0
+    for i, move in enumerate(movement._moves):
+        start_time = end_time
+        end_time += move.get_total_time()
+        if t <= end_time:
+            return i, t - start_time
+    return len(movement._moves) - 1, t - start_time
+
+
+@pytest.fixture
+def tables():
+    ArcLengthTable.clear()
+    yield
+    ArcLengthTable.clear()
+
+
+def test_segment_matches_linear_scan():
+    movement = compound()
+    total = movement.get_total_time()
+    random.seed(0)
+    times = [0, total] + list(movement._ends) + \
+        [random.uniform(0, total) for i in range(200)]
+    for t in times:
+        i, into = movement._segment(t)
+        expected_i, expected_into = linear_segment(movement, t)
+        assert i == expected_i
+        assert into == pytest.approx(expected_into)
+
+
+def test_segment_on_the_ends():
+    movement = compound()
+    ends = movement._ends
+    # A move owns the time it ends at
+    for i, end in enumerate(ends):
+        index, into = movement._segment(end)
+        assert index == i
+        assert into == pytest.approx(movement._moves[i].get_total_time())
+    assert movement._segment(0) == (0, 0)
+
+
+@pytest.mark.parametrize('baked', [False, True])
+def test_get_at_start_and_end(tables, baked):
+    movement = compound(baked)
+    assert tuple(movement.get_at(0)) == pytest.approx((0, 0))
+    assert tuple(movement.get_at(1)) == pytest.approx((0, 60))
+    # The end of the second move, the start of the third
+    t = movement._ends[1] / movement.get_total_time()
+    assert tuple(movement.get_at(t)) == pytest.approx((150, 50))
+
+
+def test_identical_curves_share_a_table(tables):
+    first = compound(baked=True)
+    count = ArcLengthTable.count()
+    assert count == len(moves())
+
+    second = compound(baked=True)
+    assert ArcLengthTable.count() == count
+    for a, b in zip(first._tables, second._tables):
+        assert a is b
+
+    compound(baked=False)
+    assert ArcLengthTable.count() == count
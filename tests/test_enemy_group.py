@@ -0,0 +1,43 @@
+import random
+
+import pytest
+
+import gameobjects
+
+
+def full_bounds(group):
+    rect = group.all_enemies[0].get_rect()
+    rect.unionall_ip([e.get_rect() for e in group.all_enemies])
+    return (rect.left, rect.top, rect.right, rect.bottom)
+
+
+def classic_group(world, width=7, height=3):
+    group = gameobjects.EnemyRect()
+    group.uniform_rectangle(width, height, gameobjects.Enemy)
+    group.center_hor()
+    group.set_top(100)
+    world.append(group)
+    mover = gameobjects.MovmentClassic()
+    mover.set_child(group)
+    world.append(mover)
+    return group, mover
+
+
+@pytest.mark.parametrize('seed', range(60))
+def test_bounds_shrink_after_fractional_moves(world, seed):
+    random.seed(seed)
+    group, mover = classic_group(world)
+    left_column = [group.all_enemies[y * 7] for y in range(3)]
+    world.remove(left_column[0])
+    world.remove(left_column[2])
+
+    for i in range(random.randint(1, 120)):
+        mover.update(random.uniform(0.001, 0.05))
+    group.get_bounds()  # cached, moved by fractions from now on
+    for i in range(random.randint(1, 120)):
+        mover.update(random.uniform(0.001, 0.05))
+
+    world.remove(left_column[1])
+    cached = group.get_bounds()
+    for edge, expected in zip(cached, full_bounds(group)):
+        assert abs(edge - expected) < 1
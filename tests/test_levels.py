@@ -0,0 +1,50 @@
+import pytest
+
+import controller
+import gameobjects
+import headless
+from levels import Waves
+
+
+class RecordingSprites(dict):
+    '''ResourcesLoader.sprites, remembering the names looked up'''
+    def __init__(self, sprites):
+        super(RecordingSprites, self).__init__(sprites)
+        self.used = set()
+
+    def __getitem__(self, name):
+        self.used.add(name)
+        return super(RecordingSprites, self).__getitem__(name)
+
+
+def fire(obj):
+    '''What the objects of a wave spawn while it is played'''
+    if isinstance(obj, gameobjects.EnemyGroup):
+        for enemy in obj.all_enemies:
+            enemy.shoot()
+    elif isinstance(obj, gameobjects.MeteorGenerator):
+        obj.spawn()
+
+
+@pytest.mark.parametrize('wave_number', range(1, 7))
+def test_sprites_of_covers_the_wave(display, monkeypatch, wave_number):
+    sim = headless.Simulation(display)
+    player = sim.game.player
+    sprites = RecordingSprites(gameobjects.ResourcesLoader.sprites)
+    monkeypatch.setattr(gameobjects.ResourcesLoader, 'sprites', sprites)
+    # Bullets as objects, ProjectileSystem only looks sprites up once
+    monkeypatch.setattr(gameobjects.WorldHelper, 'projectiles', None)
+
+    for template in Waves.create_wave(wave_number, player):
+        fire(template.enemy)
+    # Killed enemies explode and drop powerups
+    controller.create_explosion(sim.game.world, (0, 0))
+    for type in (gameobjects.PowerupWeapon, gameobjects.PowerupShield,
+                 gameobjects.PowerupHealth):
+        type()
+    # A new shield after losing the first one
+    player.take_damage(gameobjects.shield_1.HEALTH)
+    player.on_powerup(gameobjects.PowerupShield)
+
+    assert sprites.used
+    assert sprites.used <= set(Waves.sprites_of(wave_number))
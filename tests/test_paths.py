@@ -0,0 +1,83 @@
+import pytest
+
+import gameobjects
+import paths
+
+CURVES = [
+    # p0, p1, p2, delay, duration
+    ((-50, 400), (300, 400), (300, 100), 0, 1),
+    ((-50, 400), (700, 400), (700, 160), 0.2, 1),
+    ((0, 0), (50, 50), (100, 0), 0.5, 2.5),
+    ((10, 20), (10, 20), (10, 20), 1, 0.5),
+]
+TIMES = [0, 0.1, 0.2, 0.5, 0.75, 1.2, 1.5, 3, 10]
+
+
+@pytest.fixture(params=['numpy', 'python'])
+def backend(request, monkeypatch):
+    if request.param == 'numpy':
+        if paths.numpy is None:
+            pytest.skip('numpy is not installed')
+    else:
+        monkeypatch.setattr(paths, 'numpy', None)
+    return request.param
+
+
+def expected_at(curve, time):
+    p0, p1, p2, delay, duration = curve
+    t = min(max((time - delay) / duration, 0), 1)
+    return gameobjects.MovementBezier(duration, p0, p1, p2).get_at(t)
+
+
+def test_path_batch_matches_movement_bezier(backend):
+    batch = paths.PathBatch()
+    for curve in CURVES:
+        batch.add(*curve)
+
+    for time in TIMES:
+        positions = batch.evaluate(time)
+        assert len(positions) == len(CURVES)
+        for curve, pos in zip(CURVES, positions):
+            assert pos == pytest.approx(tuple(expected_at(curve, time)))
+
+
+def test_path_batch_keep(backend):
+    batch = paths.PathBatch()
+    for curve in CURVES:
+        batch.add(*curve)
+    batch.evaluate(0)
+    batch.keep([True, False, True, False])
+
+    positions = batch.evaluate(0.75)
+    assert positions == [pytest.approx(tuple(expected_at(CURVES[i], 0.75)))
+                         for i in (0, 2)]
+
+
+def test_group_spawn_prunes_dead_enemies(world):
+    group = gameobjects.EnemyRect()
+    group.uniform_rectangle(4, 2, gameobjects.Enemy)
+    group.set_top(100)
+    world.append(group)
+    enemies = list(group.all_enemies)
+    targets = [tuple(e.get_pos()) for e in enemies]
+
+    spawn = gameobjects.MovementGroupSpawn()
+    spawn.set_child(group)
+    world.append(spawn)
+    spawn.update(0.3)
+
+    dead = [enemies[1], enemies[4]]
+    for e in dead:
+        world.remove(e)
+    spawn.update(0.4)
+
+    assert len(spawn._paths) == len(group.all_enemies) == 6
+    start = spawn.STARTING_POS
+    for index, e in enumerate(enemies):
+        if e in dead:
+            continue
+        target = targets[index]
+        curve = (start, (target[0], start[1]), target,
+                 index * spawn.DELAY, spawn.ONE_CURVE_TIME)
+        assert tuple(e.get_pos()) == pytest.approx(
+            tuple(expected_at(curve, 0.7)))
@@ -0,0 +1,47 @@
+import pytest
+
+import gameobjects
+import headless
+import projectiles
+
+pytestmark = pytest.mark.skipif(projectiles.numpy is None,
+                                reason='projectiles need numpy')
+
+
+def test_buffer_lerps_from_the_previous_tick():
+    buffer = projectiles.ProjectileBuffer(capacity=1)
+    buffer.spawn((10, 100), (0, -600), 1, 0)
+    buffer.spawn((20, 100), (60, 0), 1, 0)
+    assert buffer.lerp(0.5).tolist() == [[10, 100], [20, 100]]
+
+    buffer.integrate(0.1)
+    assert buffer.lerp(0).tolist() == [[10, 100], [20, 100]]
+    assert buffer.lerp(0.5).tolist() == [[10, 70], [23, 100]]
+    assert buffer.lerp(1).tolist() == buffer.pos[:2].tolist()
+
+    buffer.kill([0])
+    assert buffer.lerp(0.5).tolist() == [[23, 100]]
+
+
+def test_draw_projectiles_interpolates(display):
+    sim = headless.Simulation(display)
+    system = sim.game.projectiles
+    system.spawn(gameobjects.Bullet, (100, 500))
+    sim.updater.fixed_step = True
+    sim.updater.step_world(1.5 / sim.updater.tick_rate)
+    assert sim.updater.alpha == pytest.approx(0.5)
+
+    current, between = [], []
+    system.draw_projectiles(current)
+    system.draw_projectiles(between, sim.updater.alpha)
+    step = gameobjects.Bullet.SPEED / sim.updater.tick_rate
+    assert between[0][1][1] == pytest.approx(current[0][1][1] - step / 2)
+
+
+def test_input_driven_objects_are_not_interpolated(display):
+    sim = headless.Simulation(display)
+    sim.updater.fixed_step = True
+    sim.updater.step_world(1.5 / sim.updater.tick_rate)
+    previous = sim.updater.previous_positions
+    assert previous
+    assert sim.game.player not in previous
@@ -0,0 +1,109 @@
+import pygame
+import pytest
+
+import gameobjects
+import headless
+import projectiles
+
+
+def dirty_sim(display):
+    sim = headless.Simulation(display, render=True, invulnerable=True)
+    sim.render.dirty_mode = True
+    return sim
+
+
+def covered(rect, rects):
+    return any(r.contains(rect) for r in rects)
+
+
+def test_overlay_is_updated_in_its_frame(display):
+    sim = dirty_sim(display)
+    drawn = pygame.rect.Rect(600, 300, 40, 20)
+
+    def overlay(surface):
+        return [surface.fill((255, 255, 255), drawn)]
+
+    # No scrolling, the first frame is a full update
+    sim.render.draw_frame(0)
+    sim.render.add_overlay(overlay)
+    sim.render.draw_frame(0)
+    assert sim.game.dirty_rects is not None
+    assert covered(drawn, sim.game.dirty_rects)
+
+
+def full_redraw(sim, surface):
+    '''The frame drawn from scratch'''
+    sim.render.bg.fill(surface)
+    items = []
+    for obj in sim.game.world.get_all_objects():
+        obj.draw_batch(items)
+    if sim.game.projectiles is not None:
+        sim.game.projectiles.draw_projectiles(items)
+    surface.blits(items)
+    sim.game.gui.draw(surface)
+    return pygame.image.tobytes(surface, 'RGB')
+
+
+def test_dirty_updates_match_full_redraw(display):
+    '''What display.update shows equals the frame, scrolling included'''
+    sim = dirty_sim(display)
+    assert sim.render.bg.scroll_speed > 0
+    # Room for every scrolled detail of the default background
+    sim.render.MAX_DIRTY_RECTS = 1024
+    expected = pygame.surface.Surface(display.get_size()).convert()
+    shown = None
+    full_updates = 0
+    for i in range(240):
+        sim.tick(1 / 60)
+        dirty = sim.game.dirty_rects
+        if dirty is None:
+            full_updates += 1
+            shown = display.copy()
+        else:
+            for rect in dirty:
+                shown.blit(display, rect, rect)
+        sim.game.dirty_rects = None
+        assert pygame.image.tobytes(shown, 'RGB') == \
+            full_redraw(sim, expected), 'frame {}'.format(i)
+    # Scrolling alone does not need the whole screen
+    assert full_updates < 10
+
+
+def opaque_pixel(image):
+    '''A fully opaque (x, y) of image, the closest to its center'''
+    w, h = image.get_size()
+    pixels = [(x, y) for x in range(w) for y in range(h)
+              if image.get_at((x, y)).a == 255]
+    return min(pixels, key=lambda p: (p[0] - w // 2) ** 2 +
+                                     (p[1] - h // 2) ** 2)
+
+
+@pytest.mark.skipif(projectiles.numpy is None,
+                    reason='projectiles need numpy')
+def test_bullets_are_drawn_over_enemies(display):
+    sim = headless.Simulation(display, render=True)
+    pos = (640, 300)
+    enemy = gameobjects.Enemy()
+    sim.game.world.append(enemy)
+    enemy.set_pos(pos)
+    sim.game.projectiles.spawn(gameobjects.Bullet, pos)
+
+    image = gameobjects.ResourcesLoader.sprites[
+        gameobjects.Bullet.SPRITE_NAME].image
+    x, y = opaque_pixel(image)
+    w, h = image.get_size()
+    at = (int(pos[0] - w / 2) + x, int(pos[1] - h / 2) + y)
+
+    sim.render.draw_frame(0)
+    assert display.get_at(at)[:3] == image.get_at((x, y))[:3]
+
+
+def test_scrolled_rects_count_towards_the_cap(display):
+    sim = dirty_sim(display)
+    sim.render.MAX_DIRTY_RECTS = 64
+    for i in range(30):
+        sim.tick(1 / 60)
+        dirty = sim.game.dirty_rects
+        sim.game.dirty_rects = None
+        if dirty is not None:
+            assert len(dirty) <= sim.render.MAX_DIRTY_RECTS
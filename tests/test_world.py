@@ -0,0 +1,71 @@
+import controller
+
+
+def object_set(count):
+    objects = controller.ObjectSet()
+    for i in range(count):
+        objects.append(i)
+    return objects
+
+
+def test_object_set_iterates_in_order():
+    objects = object_set(5)
+    objects.remove(2)
+    assert list(objects) == [0, 1, 3, 4]
+    assert len(objects) == 4
+    assert objects[2] == 3
+
+
+def test_object_set_compact_keeps_the_index():
+    objects = object_set(10)
+    for obj in (7, 2, 5):
+        objects.remove(obj)
+    objects.compact()
+    assert objects._holes == 0
+    assert list(objects) == [0, 1, 3, 4, 6, 8, 9]
+    objects.remove(8)
+    objects.remove(0)
+    assert list(objects) == [1, 3, 4, 6, 9]
+
+
+def test_object_set_loop_walks_a_snapshot():
+    objects = object_set(5)
+    objects.remove(0)
+
+    seen = []
+    for obj in objects:
+        seen.append(obj)
+        if obj == 1:
+            objects.remove(3)
+            objects.remove(4)
+            objects.append(5)
+    # Changes made during the loop show from the next one on
+    assert seen == [1, 2, 3, 4]
+    assert list(objects) == [1, 2, 5]
+
+
+def test_object_set_nested_loops():
+    objects = object_set(4)
+    seen = []
+    for a in objects:
+        if a == 0:
+            objects.remove(2)
+        for b in objects:
+            seen.append((a, b))
+    assert seen[:3] == [(0, 0), (0, 1), (0, 3)]
+    assert (2, 0) in seen
+
+
+def test_world_flush_compacts(world):
+    world.begin_deferred()
+    objects = [controller.gameobjects.Explosion() for i in range(5)]
+    for obj in objects:
+        world.append(obj)
+    world.end_deferred()
+
+    world.begin_deferred()
+    for obj in objects[::2]:
+        world.remove(obj)
+    world.end_deferred()
+    assert world.get_all_objects()._holes == 0
+    assert list(world.get_all_objects()) == objects[1::2]